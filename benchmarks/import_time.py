@@ -0,0 +1,115 @@
+"""
+Cold-import benchmark for the package entry points.
+
+Each entry point is imported in a fresh interpreter, `repeat` times, and the median wall
+time is compared against its budget. The heavy optional dependencies it drags in are
+reported too, and loading one that is listed as forbidden for that entry point fails the
+check just like a blown budget, so a stray top-level import in a pricing module shows up
+here before it shows up as worker start-up latency:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 9 --budget-scale 1.5 --out imports.json
+
+Exit status is 1 if any entry point is over budget or loads a forbidden module.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = (
+    "pandas", "pandas_datareader", "sklearn", "matplotlib", "tqdm", "numba",
+    "scipy.interpolate", "scipy.optimize", "scipy.special",
+)
+_DATA_ONLY = ("pandas", "pandas_datareader", "sklearn", "matplotlib", "tqdm")
+# Pricing workers may load scipy.special (ndtr) but build splines and solvers lazily.
+_PRICING = _DATA_ONLY + ("scipy.interpolate", "scipy.optimize")
+
+# module → (budget in seconds, modules it must not load). Budgets are ~1.5× the typical
+# median cold import measured on one CPU with numpy 2.4 / scipy 1.17 / pandas 3.0, where
+# scipy.special alone costs ~0.3 s:
+#
+#     capfloor_black / bachelier / book, implied_vol   0.43–0.68 s
+#     capfloor_gaussian_hjm                            0.47–0.58 s
+#     discount_curve, capfloor_cube, capfloor_mc       0.12–0.24 s
+#     forward_curve 0.91–1.00 s,  volSurface 0.59 s,  data.registry 0.14–0.15 s
+ENTRY_POINTS = {
+    "pricers.capfloor_black": (0.90, _PRICING),
+    "pricers.capfloor_bachelier": (0.90, _PRICING),
+    "pricers.capfloor_book": (0.90, _PRICING),
+    "pricers.implied_vol": (0.90, _PRICING),
+    "rates.discount_curve": (0.25, _PRICING + ("scipy.special",)),
+    "volatility.capfloor_cube": (0.25, _PRICING + ("scipy.special",)),
+    "pricers.capfloor_gaussian_hjm": (0.90, _PRICING),
+    "pricers.capfloor_mc": (0.35, _PRICING + ("scipy.special",)),
+    "rates.forward_curve": (1.50, ("pandas_datareader", "sklearn", "matplotlib", "tqdm")),
+    "simulation.volSurface": (0.90, ("pandas_datareader", "sklearn", "matplotlib", "tqdm")),
+    "data.registry": (0.25, ("pandas", "pandas_datareader")),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(module: str, python: str = sys.executable) -> dict:
+    """Import `module` in a fresh interpreter; returns {"seconds", "loaded"}."""
+    out = subprocess.run(
+        [python, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=REPO_ROOT, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(modules: list[str], repeat: int, budget_scale: float = 1.0) -> dict:
+    results = {}
+    for module in modules:
+        budget, forbidden = ENTRY_POINTS[module]
+        runs = [probe(module) for _ in range(repeat)]
+        seconds = [r["seconds"] for r in runs]
+        loaded = runs[-1]["loaded"]
+        median = statistics.median(seconds)
+        results[module] = {
+            "median_s": median,
+            "min_s": min(seconds),
+            "budget_s": budget * budget_scale,
+            "loaded": loaded,
+            "forbidden_loaded": [m for m in loaded if m in forbidden],
+        }
+        results[module]["ok"] = (
+            median <= results[module]["budget_s"] and not results[module]["forbidden_loaded"]
+        )
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget, e.g. for slower CI machines")
+    parser.add_argument("--out", default=None, help="JSON output path")
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.repeat, args.budget_scale)
+    for module, r in results.items():
+        flag = "ok" if r["ok"] else "FAIL"
+        extra = f"  forbidden: {', '.join(r['forbidden_loaded'])}" if r["forbidden_loaded"] else ""
+        print(f"{flag:4} {module:32} {r['median_s']:.3f}s / {r['budget_s']:.2f}s{extra}", file=sys.stderr)
+
+    if args.out is not None:
+        with open(args.out, "w") as fh:
+            fh.write(json.dumps(results, indent=2) + "\n")
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
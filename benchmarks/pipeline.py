@@ -0,0 +1,196 @@
+"""
+End-to-end performance benchmark on synthetic data.
+
+Times (and memory-profiles) every pipeline stage at a set of problem sizes and writes a
+JSON report that can be diffed across commits:
+
+    python -m benchmarks.pipeline --sizes small medium --out bench.json
+    python -m benchmarks.pipeline --sizes large --repeat 5
+
+Each stage is run `repeat` times for wall-clock timing, then once more under tracemalloc
+for peak traced allocation (NumPy buffers included). Stage inputs come from the previous
+stages, so a size preset describes one realistic run from par yields to prices.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date as dt, datetime, timezone
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# history years, quoted par tenors (None = FRED UST grid), VS tenors in months,
+# PCA window months, MC paths, book size
+SIZES = {
+    "small": dict(years=1, par_tenors=None, vs_tenors=24, window_months=3, n_paths=1_000, n_trades=100),
+    "medium": dict(years=3, par_tenors=None, vs_tenors=36, window_months=3, n_paths=5_000, n_trades=1_000),
+    "large": dict(years=10, par_tenors=None, vs_tenors=60, window_months=6, n_paths=20_000, n_trades=10_000),
+}
+DEGREES = [1, 2, 3]
+N_FACTORS = 3
+MC_HORIZON_YR = 2
+STEPS_PER_YEAR = 12
+
+
+def measure(fn: Callable, repeat: int) -> tuple[dict, object]:
+    """Run fn `repeat` times for timing plus once under tracemalloc; returns (stats, result)."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "median_s": float(np.median(seconds)),
+        "min_s": float(np.min(seconds)),
+        "peak_mb": peak / 2 ** 20,
+    }, result
+
+
+def synthetic_book(n_trades: int, horizon_yr: int, seed: int = 0):
+    """Quarterly caps/floors with random maturity ≤ horizon, strike and notional."""
+    from instruments.capsfloors import CapFloor, CashFlow
+
+    rng = np.random.default_rng(seed)
+    book = []
+    for _ in range(n_trades):
+        n_periods = int(rng.integers(2, 4 * horizon_yr + 1))
+        sched = [
+            CashFlow(pay_date=(i + 1) / 4, fixing_time=i / 4, accrual=0.25, start=i / 4, end=(i + 1) / 4)
+            for i in range(1, n_periods)
+        ]
+        book.append(CapFloor(
+            strike=float(rng.uniform(0.02, 0.06)),
+            notional=float(rng.uniform(1e5, 1e7)),
+            schedule=sched,
+            payoff_type=str(rng.choice(["cap", "floor"])),
+        ))
+    return book
+
+
+def run_size(cfg: dict, repeat: int, seed: int) -> dict:
+    from data.synthetic import SyntheticTSDLoader
+    from instruments.book import CapFloorBook
+    from pricers.capfloor_bachelier import CapFloorBachelierEngine
+    from pricers.capfloor_black import CapFloorBlackEngine
+    from pricers.capfloor_mc import CapFloorMCEngine
+    from rates.discount_curve import DiscountCurve
+    from rates.forward_curve import bootstrap_discount_factors, build_forward_curve
+    from simulation.MonteCarlo import MCSimulation
+    from simulation.drift import get_HJM_drifts
+    from simulation.hjm_forward import HJMForwardSimulator
+    from simulation.volSurface import VolatilitySurface
+    from volatility.capfloor_cube import CapFloorVolCube
+
+    stages = {}
+    edate = dt(2025, 12, 31)
+    sdate = dt(edate.year - cfg["years"], 1, 2)
+    par = SyntheticTSDLoader(n_tenors=cfg["par_tenors"], seed=seed).load(sdate, edate)
+
+    stages["bootstrap_discount_factors"], df_tsd = measure(lambda: bootstrap_discount_factors(par), repeat)
+    stages["build_forward_curve"], fwd_tsd = measure(lambda: build_forward_curve(par), repeat)
+
+    fwd = fwd_tsd.to_dataframe()
+    fwd = fwd[fwd.columns[:cfg["vs_tenors"]]]
+
+    def build_vs():
+        vs = VolatilitySurface(
+            forward_curves=fwd, localVol_window_months=cfg["window_months"], n_factors=N_FACTORS,
+        )
+        vs.build()
+        return vs
+
+    stages["VolatilitySurface.build"], vs = measure(build_vs, repeat)
+    stages["get_HJM_drifts"], _ = measure(lambda: get_HJM_drifts(vs, DEGREES), repeat)
+
+    mc_paths = max(1, cfg["n_paths"] // 100)  # historical replay is per-date; keep it modest
+    stages["MCSimulation.sim"], _ = measure(
+        lambda: MCSimulation(vs, seed=seed).sim(DEGREES, paths=mc_paths), repeat,
+    )
+
+    sim = HJMForwardSimulator.from_volatility_surface(vs, DEGREES, seed=seed)
+    stages["HJMForwardSimulator.simulate"], _ = measure(
+        lambda: sim.simulate(
+            dt=1 / STEPS_PER_YEAR, n_steps=MC_HORIZON_YR * STEPS_PER_YEAR, n_paths=cfg["n_paths"],
+        ),
+        repeat,
+    )
+
+    insts = synthetic_book(cfg["n_trades"], MC_HORIZON_YR, seed=seed)
+    stages["CapFloorMCEngine.price"], _ = measure(
+        lambda: CapFloorMCEngine(sim).price(insts[0], n_paths=cfg["n_paths"], steps_per_year=STEPS_PER_YEAR),
+        repeat,
+    )
+
+    curve = DiscountCurve.from_tsd(df_tsd, pd.Timestamp(par.time[-1]))
+    cube = CapFloorVolCube(
+        expiries=[0.25, 1.0, 2.0, 5.0], accruals=[0.25, 0.5], strikes=[0.01, 0.03, 0.05, 0.08],
+        vols={"lognormal": np.full((4, 2, 4), 0.25), "normal": np.full((4, 2, 4), 0.009)},
+    )
+    book = CapFloorBook.from_capfloors(insts)
+    for label, engine_cls in (("Black", CapFloorBlackEngine), ("Bachelier", CapFloorBachelierEngine)):
+        engine = engine_cls(curve, curve, cube)
+        stages[f"CapFloor{label}Engine.price"], _ = measure(lambda: [engine.price(i) for i in insts], repeat)
+        stages[f"CapFloor{label}Engine.price_book"], _ = measure(lambda: engine.price_book(book), repeat)
+
+    return {
+        "config": {**cfg, "n_dates": len(par.time), "n_par_tenors": len(par.tenors)},
+        "stages": stages,
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="JSON output path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "results": {}}
+    for name in args.sizes:
+        print(f"benchmarking '{name}' ...", file=sys.stderr)
+        report["results"][name] = run_size(SIZES[name], args.repeat, args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.out is None:
+        print(text)
+    else:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
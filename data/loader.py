@@ -1,8 +1,6 @@
 from abc import ABC, abstractmethod
 
-import pandas_datareader.data as web
 from datetime import date as dt
-import pandas as pd
 import numpy as np
 
 import logging
@@ -94,6 +92,10 @@ class FREDtsdLoader(TermStructureLoader):
             for sid, tenor in overwrite_tm.items():
                 tenor_to_series[tenor] = sid
         
+        # network client and pandas are only needed for a live download
+        import pandas as pd
+        import pandas_datareader.data as web
+
         series_id = list(tenor_to_series.values())
         new_tenor_map = {sid: tenor for (tenor, sid) in tenor_to_series.items()}
         df = web.DataReader(series_id, self._base_source, sdate, edate)
@@ -0,0 +1,122 @@
+"""
+Offline par-yield generator for tests, demos and benchmarks.
+
+`SyntheticTSDLoader` is a drop-in `TermStructureLoader`: it returns a
+`TermStructureData` of par yields with the same conventions as `FREDtsdLoader`
+(decimal yields, integer tenors in months, business-day time index), so every pipeline
+entry point can run without network access.
+
+Curves follow a dynamic Nelson–Siegel model,
+
+    y(τ) = β0 + β1 · (1 - e^{-τ/λ}) / (τ/λ) + β2 · [(1 - e^{-τ/λ}) / (τ/λ) - e^{-τ/λ}],
+
+with level/slope/curvature factors following independent mean-reverting AR(1)
+processes (exact OU discretization), plus small i.i.d. per-tenor noise. Defaults give
+UST-like shapes and daily moves of a few bp.
+"""
+from datetime import date as dt
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .loader import TermStructureLoader
+from .term_data import TermStructureData
+from utils.util import TM, ANNUALIZE_FACTOR
+
+# Business-day calendars used for each DataFreq.
+_FREQ_ALIASES = {"D": "B", "W": "W-FRI", "M": "BME", "Y": "BYE"}
+
+
+class SyntheticTSDLoader(TermStructureLoader):
+    def __init__(
+            self,
+            tenors_m: Optional[Sequence[int]] = None,
+            n_tenors: Optional[int] = None,
+            seed: Optional[int] = None,
+            mean: Sequence[float] = (0.045, -0.015, 0.005),
+            reversion: Sequence[float] = (0.3, 0.6, 1.0),
+            vol: Sequence[float] = (0.008, 0.010, 0.015),
+            decay_yr: float = 1.8,
+            noise_bp: float = 0.5,
+    ):
+        """
+        tenors_m:   tenor grid in months; defaults to the FRED UST grid (1M..30Y)
+        n_tenors:   alternatively, generate this many tenors spaced log-uniformly in 1..360M
+        mean, reversion, vol: long-run level, speed (1/yr) and vol (/√yr) of the
+                    (level, slope, curvature) factors
+        decay_yr:   Nelson–Siegel λ in years
+        noise_bp:   per-tenor observation noise, bp
+        """
+        if tenors_m is not None and n_tenors is not None:
+            raise ValueError("Pass tenors_m or n_tenors, not both.")
+        if n_tenors is not None:
+            tenors_m = self._log_spaced_tenors(n_tenors)
+        elif tenors_m is None:
+            tenors_m = sorted(TM["D"]["fred_UST"].values())
+        tenors_m = np.asarray(tenors_m, dtype=int)
+        if tenors_m[0] <= 0 or not np.all(np.diff(tenors_m) > 0):
+            raise ValueError("tenors_m must be positive and strictly increasing.")
+
+        self.tenors_m = tenors_m
+        self.seed = seed
+        self.mean = np.asarray(mean, dtype=float)
+        self.reversion = np.asarray(reversion, dtype=float)
+        self.vol = np.asarray(vol, dtype=float)
+        self.decay_yr = decay_yr
+        self.noise_bp = noise_bp
+
+    @staticmethod
+    def _log_spaced_tenors(n_tenors: int) -> np.ndarray:
+        if not 2 <= n_tenors <= 360:
+            raise ValueError("n_tenors must be between 2 and 360.")
+        # Grow the geometric sample until rounding to whole months leaves n unique tenors.
+        k = n_tenors
+        while True:
+            tenors = np.unique(np.rint(np.geomspace(1, 360, k)).astype(int))
+            if len(tenors) >= n_tenors:
+                break
+            k += 1
+        idx = np.rint(np.linspace(0, len(tenors) - 1, n_tenors)).astype(int)
+        return tenors[idx]
+
+    def loadings(self) -> np.ndarray:
+        """(n_tenors, 3) Nelson–Siegel loadings on the tenor grid."""
+        x = self.tenors_m / 12.0 / self.decay_yr
+        slope = (1.0 - np.exp(-x)) / x
+        return np.stack([np.ones_like(x), slope, slope - np.exp(-x)], axis=1)
+
+    def load(self, sdate: dt, edate: dt, DataFreq: str = "D") -> TermStructureData:
+        if sdate is None or edate is None:
+            raise ValueError("Both sdate and edate must be provided.")
+        if sdate >= edate:
+            raise ValueError(
+                f"sdate must be earlier than edate, got sdate={sdate}, edate={edate}"
+            )
+        if DataFreq not in _FREQ_ALIASES:
+            raise ValueError(f"Unknown DataFreq '{DataFreq}'. Supported: {list(_FREQ_ALIASES)}.")
+
+        time = pd.date_range(sdate, edate, freq=_FREQ_ALIASES[DataFreq])
+        n = len(time)
+        if n < 2:
+            raise ValueError("Date range yields fewer than two observations.")
+
+        rng = np.random.default_rng(self.seed)
+        dt_yr = 1.0 / ANNUALIZE_FACTOR[DataFreq]
+        phi = np.exp(-self.reversion * dt_yr)
+        step_sd = self.vol * np.sqrt((1.0 - phi ** 2) / (2.0 * self.reversion))
+
+        factors = np.empty((n, 3))
+        factors[0] = self.mean + self.vol / np.sqrt(2.0 * self.reversion) * rng.standard_normal(3)
+        shocks = rng.standard_normal((n - 1, 3)) * step_sd
+        for i in range(1, n):
+            factors[i] = self.mean + phi * (factors[i - 1] - self.mean) + shocks[i - 1]
+
+        values = factors @ self.loadings().T
+        values += self.noise_bp * 1e-4 * rng.standard_normal(values.shape)
+
+        return TermStructureData(
+            time=time.to_numpy(),
+            tenors=self.tenors_m,
+            values=values,
+        )
@@ -1,8 +1,11 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import numpy as np
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 @dataclass(frozen=True)
 class TermStructureData:
     time: np.ndarray
@@ -22,7 +25,9 @@ class TermStructureData:
         if not np.all(np.diff(self.tenors) > 0):
             raise ValueError("Tenors must be strictly increasing.")
         
-    def to_dataframe(self) -> pd.DataFrame:
+    def to_dataframe(self) -> "pd.DataFrame":
+        import pandas as pd
+
         return pd.DataFrame(
             self.values,
             index=self.time, 
@@ -0,0 +1,227 @@
+"""
+Columnar (struct-of-arrays) representation of a cap/floor book.
+
+A `CapFloor` holds a Python sequence of `CashFlow` tuples, which is convenient for one
+trade but means millions of small objects for a large book. `CapFloorBook` keeps the
+same information as flat arrays:
+
+    caplet columns  (n_caplets,)   pay_date, fixing_time, accrual, start, end
+    trade columns   (n_trades,)    strike, notional, sign, model_hint, index_name, pay_conv, trade_id
+    offsets         (n_trades + 1,) CSR-style: trade t owns caplets offsets[t]:offsets[t+1]
+
+All pricing engines accept either a book or a sequence of `CapFloor`s (`as_book`).
+Flat files use the long layout, one row per caplet with the trade columns repeated; trades
+keep their order of first appearance and their ids (`trade_id`), so the (n_trades,)
+outputs of the engines line up with the file:
+
+    trade_id, strike, notional, payoff_type, pay_date, fixing_time, accrual, start, end
+    [, model_hint, index_name, pay_conv]
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from instruments.capsfloors import CapFloor, CashFlow
+
+CAPLET_COLUMNS = ("pay_date", "fixing_time", "accrual", "start", "end")
+
+
+@dataclass(frozen=True)
+class CapFloorBook:
+    strike: np.ndarray
+    notional: np.ndarray
+    sign: np.ndarray
+    offsets: np.ndarray
+    pay_date: np.ndarray
+    fixing_time: np.ndarray
+    accrual: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    model_hint: Optional[np.ndarray] = None
+    index_name: Optional[np.ndarray] = None
+    pay_conv: Optional[np.ndarray] = None
+    trade_id: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        n_trades = len(self.strike)
+        if len(self.offsets) != n_trades + 1 or self.offsets[0] != 0:
+            raise ValueError("offsets must have n_trades + 1 entries starting at 0.")
+        if np.any(np.diff(self.offsets) <= 0):
+            raise ValueError("Schedule cannot be empty.")
+        if any(len(getattr(self, c)) != self.offsets[-1] for c in CAPLET_COLUMNS):
+            raise ValueError("caplet columns must all have offsets[-1] rows.")
+        if len(self.notional) != n_trades or len(self.sign) != n_trades:
+            raise ValueError("trade columns must all have n_trades rows.")
+        if np.any(self.notional <= 0):
+            raise ValueError("Notional must be non-negative.")
+        if np.any(self.strike < 0):
+            raise ValueError("Strike must be positive.")
+        if np.any(self.accrual <= 0):
+            raise ValueError("all accruals must be > 0")
+        if not np.all(np.isin(self.sign, (-1, 1))):
+            raise ValueError("sign must be +1 (cap) or -1 (floor).")
+        # Fill optional trade columns with CapFloor's defaults.
+        for name, default in (("model_hint", "auto"), ("index_name", None), ("pay_conv", "ACT/360")):
+            if getattr(self, name) is None:
+                object.__setattr__(self, name, np.full(n_trades, default, dtype=object))
+        if self.trade_id is None:
+            object.__setattr__(self, "trade_id", np.arange(n_trades))
+        elif len(self.trade_id) != n_trades:
+            raise ValueError("trade columns must all have n_trades rows.")
+
+    def __len__(self) -> int:
+        return len(self.strike)
+
+    @property
+    def n_caplets(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def per_caplet(self, trade_values: np.ndarray) -> np.ndarray:
+        """Broadcast a (n_trades,) column to (n_caplets,)."""
+        return np.repeat(np.asarray(trade_values), self.counts)
+
+    def per_trade(self, caplet_values: np.ndarray) -> np.ndarray:
+        """Sum (..., n_caplets) values into (..., n_trades) totals."""
+        return np.add.reduceat(caplet_values, self.offsets[:-1], axis=-1)
+
+    # ------------------------------------------------------------------ conversions
+
+    @classmethod
+    def from_capfloors(cls, insts: Sequence[CapFloor]) -> "CapFloorBook":
+        if len(insts) == 0:
+            raise ValueError("insts cannot be empty.")
+        counts = np.array([len(inst.schedule) for inst in insts])
+        cfs = np.array([tuple(cf) for inst in insts for cf in inst.schedule], dtype=float)
+        return cls(
+            strike=np.array([inst.strike for inst in insts], dtype=float),
+            notional=np.array([inst.notional for inst in insts], dtype=float),
+            sign=np.array([inst.sign for inst in insts], dtype=np.int8),
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            **{c: cfs[:, i] for i, c in enumerate(CAPLET_COLUMNS)},
+            model_hint=np.array([inst.model_hint for inst in insts], dtype=object),
+            index_name=np.array([inst.index_name for inst in insts], dtype=object),
+            pay_conv=np.array([inst.pay_conv for inst in insts], dtype=object),
+        )
+
+    @classmethod
+    def concat(cls, books: Sequence["CapFloorBook"]) -> "CapFloorBook":
+        """Stack books trade-wise; trade t of books[i] lands at sum(len(books[:i])) + t."""
+        if len(books) == 0:
+            raise ValueError("books cannot be empty.")
+        if len(books) == 1:
+            return books[0]
+        starts = np.cumsum([0] + [b.n_caplets for b in books[:-1]])
+        return cls(
+            strike=np.concatenate([b.strike for b in books]),
+            notional=np.concatenate([b.notional for b in books]),
+            sign=np.concatenate([b.sign for b in books]),
+            offsets=np.concatenate([[0]] + [b.offsets[1:] + s for b, s in zip(books, starts)]),
+            **{c: np.concatenate([getattr(b, c) for b in books]) for c in CAPLET_COLUMNS},
+            model_hint=np.concatenate([b.model_hint for b in books]),
+            index_name=np.concatenate([b.index_name for b in books]),
+            pay_conv=np.concatenate([b.pay_conv for b in books]),
+            trade_id=np.concatenate([np.asarray(b.trade_id, dtype=object) for b in books]),
+        )
+
+    def to_capfloors(self) -> list[CapFloor]:
+        cols = np.stack([getattr(self, c) for c in CAPLET_COLUMNS], axis=1).tolist()
+        out = []
+        for t in range(len(self)):
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            out.append(CapFloor(
+                strike=float(self.strike[t]),
+                notional=float(self.notional[t]),
+                schedule=[CashFlow(*row) for row in cols[lo:hi]],
+                payoff_type="cap" if self.sign[t] == 1 else "floor",
+                index_name=self.index_name[t],
+                pay_conv=self.pay_conv[t],
+                model_hint=self.model_hint[t],
+            ))
+        return out
+
+    @classmethod
+    def from_frame(cls, df) -> "CapFloorBook":
+        """
+        Build from a long (one row per caplet) DataFrame; rows are grouped by trade_id,
+        trades ordered by first appearance. Trade-level columns must agree on every
+        row of a trade.
+        """
+        import pandas as pd
+
+        missing = {"trade_id", "strike", "notional", "payoff_type", *CAPLET_COLUMNS} - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing columns: {sorted(missing)}.")
+
+        codes, ids = pd.factorize(df["trade_id"], sort=False)
+        if np.any(codes < 0):
+            raise ValueError("trade_id cannot be missing.")
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        counts = np.diff(np.r_[starts, len(codes)])
+
+        def trade_col(name, clean=None):
+            if name not in df.columns:
+                return None
+            vals = df[name].to_numpy()[order]
+            if clean is not None:
+                vals = np.array([clean(v) for v in vals], dtype=object)
+            first = vals[starts]
+            rep = np.repeat(first, counts)
+            differ = (vals != rep) & ~(pd.isna(vals) & pd.isna(rep))
+            if np.any(differ):
+                bad = ids[codes[np.flatnonzero(differ)[0]]]
+                raise ValueError(f"Column '{name}' varies within trade {bad!r}.")
+            return first
+
+        def label_col(name, default):
+            # Blank CSV cells come back as NaN; map them to CapFloor's default.
+            return trade_col(name, clean=lambda v: v if isinstance(v, str) else default)
+
+        payoff = trade_col("payoff_type")
+        if not np.all(np.isin(payoff, ("cap", "floor"))):
+            raise ValueError("payoff_type must be 'cap' or 'floor'.")
+        return cls(
+            strike=trade_col("strike").astype(float),
+            notional=trade_col("notional").astype(float),
+            sign=np.where(payoff == "cap", 1, -1).astype(np.int8),
+            offsets=np.r_[starts, len(codes)],
+            **{c: df[c].to_numpy(dtype=float)[order] for c in CAPLET_COLUMNS},
+            model_hint=label_col("model_hint", "auto"),
+            index_name=label_col("index_name", None),
+            pay_conv=label_col("pay_conv", "ACT/360"),
+            trade_id=np.asarray(ids, dtype=object),
+        )
+
+    def to_frame(self, trade_ids: Optional[Sequence] = None):
+        import pandas as pd
+
+        ids = self.trade_id if trade_ids is None else np.asarray(trade_ids)
+        data = {"trade_id": self.per_caplet(ids)}
+        data["strike"] = self.per_caplet(self.strike)
+        data["notional"] = self.per_caplet(self.notional)
+        data["payoff_type"] = self.per_caplet(np.where(self.sign == 1, "cap", "floor"))
+        data.update({c: getattr(self, c) for c in CAPLET_COLUMNS})
+        for c in ("model_hint", "index_name", "pay_conv"):
+            data[c] = self.per_caplet(getattr(self, c))
+        return pd.DataFrame(data)
+
+    @classmethod
+    def from_csv(cls, path, **read_kwargs) -> "CapFloorBook":
+        import pandas as pd
+        return cls.from_frame(pd.read_csv(path, **read_kwargs))
+
+    @classmethod
+    def from_parquet(cls, path, **read_kwargs) -> "CapFloorBook":
+        """Requires a pandas Parquet engine (pyarrow or fastparquet)."""
+        import pandas as pd
+        return cls.from_frame(pd.read_parquet(path, **read_kwargs))
+
+
+def as_book(insts: Union[CapFloorBook, Sequence[CapFloor]]) -> CapFloorBook:
+    return insts if isinstance(insts, CapFloorBook) else CapFloorBook.from_capfloors(insts)
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from typing import Sequence, NamedTuple, Literal, Optional
 
+import numpy as np
+
 class CashFlow(NamedTuple):
     pay_date: float       # year fraction from t0, or a datetime you convert later
     fixing_time: float
@@ -44,4 +46,18 @@ class CapFloor:
         z = abs(F - K) / (sigma * T**0.5) if sigma > 0 and T > 0 else float('inf')
         if F < 0.01 and z < 1.0:
             return "normal"
-        return "lognormal" 
+        return "lognormal"
+
+    @staticmethod
+    def choose_model_array(F, K, sigma, T, hint) -> np.ndarray:
+        """Elementwise `choose_model`; `hint` may be a scalar or a per-caplet array."""
+        F, K, sigma, T, hint = np.broadcast_arrays(
+            np.asarray(F, dtype=float), np.asarray(K, dtype=float),
+            np.asarray(sigma, dtype=float), np.asarray(T, dtype=float), np.asarray(hint),
+        )
+        live = (sigma > 0) & (T > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(live, np.abs(F - K) / (sigma * np.sqrt(np.where(live, T, 1.0))), np.inf)
+        normal = (F <= 0.0) | ((F < 0.01) & (z < 1.0))
+        auto = np.where(normal, "normal", "lognormal")
+        return np.where(hint == "auto", auto, hint).astype(auto.dtype)
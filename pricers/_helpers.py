@@ -1,5 +1,8 @@
 from math import erf, exp, pi, sqrt
 
+import numpy as np
+from scipy.special import ndtr
+
 
 def norm_cdf(x: float) -> float:
     return 0.5 * (1.0 + erf(x / sqrt(2.0)))
@@ -7,3 +10,69 @@ def norm_cdf(x: float) -> float:
 
 def norm_pdf(x: float) -> float:
     return exp(-0.5 * x * x) / sqrt(2.0 * pi)
+
+
+def norm_cdf_array(x: np.ndarray) -> np.ndarray:
+    return ndtr(x)
+
+
+def norm_pdf_array(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / sqrt(2.0 * pi)
+
+
+def bulk_dfs(curve, t: np.ndarray) -> np.ndarray:
+    """curve.dfs(t) if the curve is array-native, else one .df call per point."""
+    if hasattr(curve, "dfs"):
+        return np.asarray(curve.dfs(t), dtype=float)
+    return np.array([curve.df(ti) for ti in t], dtype=float)
+
+
+def bulk_forwards(curve, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    if hasattr(curve, "forwards"):
+        return np.asarray(curve.forwards(start, end), dtype=float)
+    return np.array([curve.forward(s, e) for s, e in zip(start, end)], dtype=float)
+
+
+def bulk_vols(vols, T: np.ndarray, accrual: np.ndarray, strike: np.ndarray, model: str) -> np.ndarray:
+    if hasattr(vols, "capfloor_vols"):
+        return np.asarray(vols.capfloor_vols(T, accrual, strike, model=model), dtype=float)
+    return np.array([
+        vols.capfloor_vol(Ti, ai, strike=Ki, model=model) for Ti, ai, Ki in zip(T, accrual, strike)
+    ], dtype=float)
+
+
+def book_greeks(book, P: np.ndarray, F: np.ndarray, K: np.ndarray, terms: dict) -> dict:
+    """
+    Scale undiscounted per-caplet call terms (`black_greeks_array` / `bachelier_greeks_array`)
+    to PV Greeks. Floors use forward put-call parity: only delta shifts (by -1).
+
+    Returns per-trade arrays for 'pv', 'delta' (∂PV/∂F), 'gamma' (∂²PV/∂F²), 'vega' (∂PV/∂σ),
+    'theta' (-∂PV/∂T, time to fixing, curves held fixed) and 'df_sens' (∂PV/∂P(pay_date)),
+    plus the same keys per caplet under 'caplets'.
+    """
+    is_put = book.per_caplet(book.sign) != 1
+    scale = book.per_caplet(book.notional) * book.accrual
+    opt = np.where(is_put, terms["call"] - F + K, terms["call"])
+    caplets = {
+        "pv": scale * P * opt,
+        "delta": scale * P * (terms["delta"] - is_put),
+        "gamma": scale * P * terms["gamma"],
+        "vega": scale * P * terms["vega"],
+        "theta": scale * P * terms["theta"],
+        "df_sens": scale * opt,
+    }
+    out = {k: book.per_trade(v) for k, v in caplets.items()}
+    out["caplets"] = caplets
+    return out
+
+
+def curve_risk(book, greeks: dict, discount_curve, forward_curve) -> np.ndarray:
+    """
+    Bucketed PV sensitivities to the curve inputs, shape (n_trades, n_inputs), by the chain
+    rule  ∂PV/∂y = df_sens · ∂P/∂y + delta · ∂F/∂y  (vols held fixed). `greeks` is the
+    `book_greeks` dict; both curves need `df_jacobian` / `forward_jacobian` (DiscountCurve).
+    """
+    caplets = greeks["caplets"]
+    d_pv = caplets["df_sens"][:, None] * discount_curve.df_jacobian(book.pay_date)
+    d_pv += caplets["delta"][:, None] * forward_curve.forward_jacobian(book.start, book.end)
+    return book.per_trade(d_pv.T).T
@@ -1,7 +1,15 @@
 from math import sqrt
+from typing import Sequence, Union
 
+import numpy as np
+
+from instruments.book import CapFloorBook, as_book
 from instruments.capsfloors import CapFloor
-from pricers._helpers import norm_cdf, norm_pdf
+from pricers._helpers import (
+    norm_cdf, norm_pdf, norm_cdf_array, norm_pdf_array,
+    bulk_dfs, bulk_forwards, bulk_vols, book_greeks,
+)
+from utils.instrumentation import add_units, instrumented
 
 
 def bachelier_call(F: float, K: float, sigma: float, T: float) -> float:
@@ -24,12 +32,48 @@ def bachelier_put(F: float, K: float, sigma: float, T: float) -> float:
     return bachelier_call(F, K, sigma, T) - F + K
 
 
+def _bachelier_d(F, K, sigma, T):
+    F, K, sigma, T = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (F, K, sigma, T)))
+    live = (sigma > 0) & (T > 0)
+    s = np.where(live, sigma * np.sqrt(np.where(live, T, 1.0)), 1.0)
+    return F, K, sigma, T, live, s, (F - K) / s
+
+
+def bachelier_call_array(F, K, sigma, T) -> np.ndarray:
+    """Elementwise `bachelier_call` over broadcastable arrays."""
+    F, K, sigma, T, live, s, d = _bachelier_d(F, K, sigma, T)
+    return np.where(live, (F - K) * norm_cdf_array(d) + s * norm_pdf_array(d), np.maximum(F - K, 0.0))
+
+
+def bachelier_greeks_array(F, K, sigma, T) -> dict:
+    """
+    Undiscounted Bachelier call and its sensitivities, elementwise:
+        delta = Φ(d),  gamma = φ(d) / (σ√T),  vega = √T φ(d),  theta = -∂C/∂T = -σ φ(d) / (2√T).
+    Expired or zero-vol caplets get intrinsic value, a step delta and zero for the rest.
+    """
+    F, K, sigma, T, live, s, d = _bachelier_d(F, K, sigma, T)
+    nd, pdf = norm_cdf_array(d), norm_pdf_array(d)
+    sqrt_T = s / np.where(live, sigma, 1.0)
+    return {
+        "call": np.where(live, (F - K) * nd + s * pdf, np.maximum(F - K, 0.0)),
+        "delta": np.where(live, nd, (F > K).astype(float)),
+        "gamma": np.where(live, pdf / s, 0.0),
+        "vega": np.where(live, sqrt_T * pdf, 0.0),
+        "theta": np.where(live, -0.5 * sigma * pdf / sqrt_T, 0.0),
+    }
+
+
+def bachelier_put_array(F, K, sigma, T) -> np.ndarray:
+    return bachelier_call_array(F, K, sigma, T) - np.asarray(F, dtype=float) + np.asarray(K, dtype=float)
+
+
 class CapFloorBachelierEngine:
     def __init__(self, discount_curve, forward_curve, vol_surface):
         self.discount = discount_curve    # must have .df(t_yr)
         self.forward = forward_curve      # must have .forward(t_start_yr, t_end_yr)
         self.vols = vol_surface           # must have .capfloor_vol(T, accrual, strike, model)
 
+    @instrumented(unit="caplets", count=lambda res, self, inst: len(inst.schedule))
     def price(self, inst: CapFloor) -> float:
         pv = 0.0
         for cf in inst.schedule:
@@ -42,3 +86,26 @@ class CapFloorBachelierEngine:
             opt = bachelier_call(F, K, sigma, T) if inst.sign == 1 else bachelier_put(F, K, sigma, T)
             pv += inst.notional * P * cf.accrual * opt
         return pv
+
+    @instrumented(unit="caplets")
+    def price_book(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            greeks: bool = False,
+    ) -> Union[np.ndarray, dict]:
+        """
+        PV of every trade, shape (n_trades,), in one vectorized pass over all caplets.
+        greeks=True returns the `book_greeks` dict instead; vega is per unit normal vol.
+        """
+        b = as_book(insts)
+        add_units(b.n_caplets)
+        K, sign = b.per_caplet(b.strike), b.per_caplet(b.sign)
+        F = bulk_forwards(self.forward, b.start, b.end)
+        P = bulk_dfs(self.discount, b.pay_date)
+        sigma = bulk_vols(self.vols, b.fixing_time, b.accrual, K, model="normal")
+
+        if greeks:
+            return book_greeks(b, P, F, K, bachelier_greeks_array(F, K, sigma, b.fixing_time))
+        call = bachelier_call_array(F, K, sigma, b.fixing_time)
+        opt = np.where(sign == 1, call, call - F + K)
+        return b.per_trade(b.per_caplet(b.notional) * P * b.accrual * opt)
@@ -1,7 +1,14 @@
 from math import log, sqrt
+from typing import Sequence, Union
 
+import numpy as np
+
+from instruments.book import CapFloorBook, as_book
 from instruments.capsfloors import CapFloor
-from pricers._helpers import norm_cdf
+from pricers._helpers import (
+    norm_cdf, norm_cdf_array, norm_pdf_array, bulk_dfs, bulk_forwards, bulk_vols, book_greeks,
+)
+from utils.instrumentation import add_units, instrumented
 
 
 def black_call(F: float, K: float, sigma: float, T: float) -> float:
@@ -21,12 +28,55 @@ def black_put(F: float, K: float, sigma: float, T: float) -> float:
     return black_call(F, K, sigma, T) - F + K
 
 
+def _black_d1(F, K, sigma, T):
+    F, K, sigma, T = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (F, K, sigma, T)))
+    live = (sigma > 0) & (T > 0)
+    if np.any(live & ((F <= 0) | (K <= 0))):
+        raise ValueError("Black model requires positive F and K; route those caplets to Bachelier.")
+    s = np.where(live, sigma * np.sqrt(np.where(live, T, 1.0)), 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(F / K) + 0.5 * s * s) / s
+    return F, K, sigma, T, live, s, d1
+
+
+def black_call_array(F, K, sigma, T) -> np.ndarray:
+    """Elementwise `black_call` over broadcastable arrays."""
+    F, K, sigma, T, live, s, d1 = _black_d1(F, K, sigma, T)
+    d2 = d1 - s
+    return np.where(live, F * norm_cdf_array(d1) - K * norm_cdf_array(d2), np.maximum(F - K, 0.0))
+
+
+def black_greeks_array(F, K, sigma, T) -> dict:
+    """
+    Undiscounted Black call and its sensitivities, elementwise:
+        delta = Φ(d1),  gamma = φ(d1) / (F σ√T),  vega = F φ(d1) √T,
+        theta = -∂C/∂T = -F φ(d1) σ / (2√T).
+    Expired or zero-vol caplets get intrinsic value, a step delta and zero for the rest.
+    """
+    F, K, sigma, T, live, s, d1 = _black_d1(F, K, sigma, T)
+    d2 = d1 - s
+    nd1, pdf = norm_cdf_array(d1), norm_pdf_array(d1)
+    sqrt_T = s / np.where(live, sigma, 1.0)
+    return {
+        "call": np.where(live, F * nd1 - K * norm_cdf_array(d2), np.maximum(F - K, 0.0)),
+        "delta": np.where(live, nd1, (F > K).astype(float)),
+        "gamma": np.where(live, pdf / (F * s), 0.0),
+        "vega": np.where(live, F * pdf * sqrt_T, 0.0),
+        "theta": np.where(live, -0.5 * F * pdf * sigma / sqrt_T, 0.0),
+    }
+
+
+def black_put_array(F, K, sigma, T) -> np.ndarray:
+    return black_call_array(F, K, sigma, T) - np.asarray(F, dtype=float) + np.asarray(K, dtype=float)
+
+
 class CapFloorBlackEngine:
     def __init__(self, discount_curve, forward_curve, vol_surface):
         self.discount = discount_curve    # must have .df(t_yr)
         self.forward = forward_curve      # must have .forward(t_start_yr, t_end_yr)
         self.vols = vol_surface           # must have .capfloor_vol(T, accrual, strike, model)
 
+    @instrumented(unit="caplets", count=lambda res, self, inst: len(inst.schedule))
     def price(self, inst: CapFloor) -> float:
         pv = 0.0
         for cf in inst.schedule:
@@ -39,3 +89,30 @@ class CapFloorBlackEngine:
             opt = black_call(F, K, sigma, T) if inst.sign == 1 else black_put(F, K, sigma, T)
             pv += inst.notional * P * cf.accrual * opt
         return pv
+
+    @instrumented(unit="caplets")
+    def price_book(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            greeks: bool = False,
+    ) -> Union[np.ndarray, dict]:
+        """
+        PV of every trade, shape (n_trades,), in one vectorized pass over all caplets.
+        Curves/vols are queried through their array methods (.dfs, .forwards,
+        .capfloor_vols) when they have them.
+
+        greeks=True returns a dict of per-trade pv/delta/gamma/vega/theta/df_sens and the
+        per-caplet arrays under 'caplets' (see `book_greeks`); vega is per unit lognormal vol.
+        """
+        b = as_book(insts)
+        add_units(b.n_caplets)
+        K, sign = b.per_caplet(b.strike), b.per_caplet(b.sign)
+        F = bulk_forwards(self.forward, b.start, b.end)
+        P = bulk_dfs(self.discount, b.pay_date)
+        sigma = bulk_vols(self.vols, b.fixing_time, b.accrual, K, model="lognormal")
+
+        if greeks:
+            return book_greeks(b, P, F, K, black_greeks_array(F, K, sigma, b.fixing_time))
+        call = black_call_array(F, K, sigma, b.fixing_time)
+        opt = np.where(sign == 1, call, call - F + K)
+        return b.per_trade(b.per_caplet(b.notional) * P * b.accrual * opt)
@@ -12,15 +12,50 @@ recovered from the simulated curve at the fixing time:
     P(T_fix; T_end) = exp(-∫_0^{T_end - T_start} f(T_fix, x) dx)
     L = (1 / P - 1) / (T_end - T_start)
 
-Assumes cashflow `fixing_time` and `pay_date` align to the simulation step grid,
-and that accrual length `T_end - T_start` is a whole multiple of the tenor spacing.
+The integrals come from `simulation.zcb.ZCBSurface`: prefix sums over each fixing-date
+curve, queried for every caplet at once, so accruals need not be whole months.
+
+Paths are simulated on an event grid (`simulation.time_grid.event_grid`): the union of
+the book's fixing and pay dates, with each gap split into steps of at most
+1/steps_per_year. Every date is then a grid node — no rounding — and a sparse schedule
+costs only the steps its dates and the step cap require. steps_per_year=None steps
+straight from event to event, which is only advisable with the simulator's
+`advection="shift"` (the central-difference Musiela step needs short steps to stay
+stable).
+
+`price_many` prices a whole book on one shared path set: the book is simulated once to
+its longest pay date and every trade is evaluated against the same paths, so per-trade
+PVs carry common random numbers and the portfolio SE reflects cross-trade covariance.
+
+`price_adaptive` replaces the fixed path count with batches run until the standard
+error meets an absolute/relative tolerance or a path/time budget is exhausted.
+
+`price_mlmc` is the multilevel estimator (Giles): nested grids h_l = h_0 / M^l, each
+level sampling Y_l = PV_l − PV_{l−1} with the coarse path driven by the sums of the
+fine Brownian increments, so Var[Y_l] shrinks with h. Path counts per level follow
+N_l ∝ √(V_l / C_l) and levels are added until the extrapolated bias fits the target,
+which brings the cost for an RMSE ε from O(ε⁻³) toward O(ε⁻²).
+
+`greeks` returns PV together with f0-bucket deltas and per-factor vegas from the same
+paths. The Musiela step f ← (I + dt·D) f + α dt + σ dW is affine in f0, so ∂f(t)/∂f0 is
+a deterministic matrix power and every sensitivity reduces to adjoint row-vector
+recursions contracted against the stored Brownian increments — no bumped re-simulation.
 """
-from typing import Optional
+import time
+from typing import Optional, Sequence, Union
 
 import numpy as np
 
+from instruments.book import CapFloorBook, as_book
 from instruments.capsfloors import CapFloor
 from simulation.hjm_forward import HJMForwardSimulator
+from simulation.time_grid import event_grid, locate, refine_grid
+from simulation.zcb import ZCBSurface
+from utils.instrumentation import add_units, instrumented
+from utils.stats import ColumnMoments, RunningMoments
+
+# Cashflows evaluated per vectorized sweep; bounds the (n_paths, chunk) payoff buffer.
+CASHFLOW_CHUNK = 512
 
 
 class CapFloorMCEngine:
@@ -31,61 +66,446 @@ class CapFloorMCEngine:
             self,
             inst: CapFloor,
             n_paths: int = 5000,
-            steps_per_year: int = 12,
+            steps_per_year: Optional[int] = 12,
             return_se: bool = False,
     ):
+        res = self.price_many([inst], n_paths=n_paths, steps_per_year=steps_per_year)
+        mean, se = float(res['pv'][0]), float(res['se'][0])
+        return {'pv': mean, 'se': se} if return_se else mean
+
+    @instrumented(unit="caplet_paths")
+    def price_many(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            n_paths: int = 5000,
+            steps_per_year: Optional[int] = 12,
+            return_cov: bool = False,
+    ) -> dict:
+        """
+        Price a book of caps/floors against a single simulated path set.
+
+        Returns a dict with
+            'pv'       (n_trades,)            per-trade PV
+            'se'       (n_trades,)            per-trade standard error
+            'total'    float                  portfolio PV
+            'total_se' float                  portfolio SE (includes cross-trade covariance)
+            'cov'      (n_trades, n_trades)   covariance of the PV estimates, if return_cov
+        """
+        book = as_book(insts)
+        add_units(book.n_caplets * n_paths)
+        pv_paths = self._grid_pv(book, self.time_grid(book, steps_per_year), n_paths)
+        return self._summarize(pv_paths, return_cov=return_cov)
+
+    @staticmethod
+    def time_grid(insts: Union[CapFloorBook, Sequence[CapFloor]], steps_per_year: Optional[int] = 12) -> np.ndarray:
+        """Simulation times for a book: its fixing and pay dates, gaps capped at 1/steps_per_year."""
+        book = as_book(insts)
+        max_dt = None if steps_per_year is None else 1.0 / steps_per_year
+        return event_grid(np.concatenate([book.fixing_time, book.pay_date]), max_dt=max_dt)
+
+    def price_adaptive(
+            self,
+            inst: CapFloor,
+            abs_tol: Optional[float] = None,
+            rel_tol: Optional[float] = None,
+            batch_paths: int = 1000,
+            max_paths: Optional[int] = None,
+            max_time: Optional[float] = None,
+            min_batches: int = 2,
+            steps_per_year: Optional[int] = 12,
+    ) -> dict:
+        """
+        Price in batches of `batch_paths` until SE ≤ abs_tol or SE ≤ rel_tol · |PV|,
+        or until `max_paths` paths / `max_time` seconds have been spent. At least one
+        of the four must be given; with tolerances only, batching runs until they are met.
+
+        Discounted payoffs are folded into Welford running moments batch by batch, so
+        memory stays at one batch regardless of how many paths are needed.
+
+        Returns a dict with 'pv', 'se', 'n_paths', 'n_batches', 'converged' and
+        'stop_reason' ('tolerance', 'max_paths' or 'max_time').
+        """
+        if abs_tol is None and rel_tol is None and max_time is None and max_paths is None:
+            raise ValueError("Need at least one of abs_tol, rel_tol, max_paths, max_time.")
+        if batch_paths < 2:
+            raise ValueError("batch_paths must be at least 2.")
+
+        book = as_book([inst])
+        times = self.time_grid(book, steps_per_year)
+
+        stats = RunningMoments()
+        n_batches, stop_reason = 0, None
+        start = time.perf_counter()
+        while stop_reason is None:
+            n = batch_paths if max_paths is None else min(batch_paths, max_paths - stats.count)
+            stats.update(self._grid_pv(book, times, n)[:, 0])
+            n_batches += 1
+
+            se = stats.se
+            if n_batches >= min_batches and (
+                    (abs_tol is not None and se <= abs_tol)
+                    or (rel_tol is not None and se <= rel_tol * abs(stats.mean))
+            ):
+                stop_reason = 'tolerance'
+            elif max_paths is not None and stats.count >= max_paths:
+                stop_reason = 'max_paths'
+            elif max_time is not None and time.perf_counter() - start >= max_time:
+                stop_reason = 'max_time'
+
+        return {
+            'pv': stats.mean,
+            'se': stats.se,
+            'n_paths': stats.count,
+            'n_batches': n_batches,
+            'converged': stop_reason == 'tolerance',
+            'stop_reason': stop_reason,
+        }
+
+    def price_mlmc(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            rmse: float,
+            base_steps_per_year: Optional[int] = None,
+            refine: int = 2,
+            min_levels: int = 3,
+            max_levels: int = 8,
+            n_pilot: int = 1000,
+            batch_paths: int = 20_000,
+            alpha: Optional[float] = None,
+    ) -> dict:
+        """
+        Multilevel MC estimate of the book with root-mean-square error ≈ `rmse` on the total.
+
+        Level 0 is the book's event grid with steps capped at 1/base_steps_per_year
+        (`time_grid`); level l splits every level-(l−1) step into `refine`. The
+        default (None) steps from event to event with `advection="shift"` and caps
+        steps at the tenor spacing with the central-difference 'gradient' step, which
+        is unstable on longer steps — an explicit base grid coarser than that raises.
+
+        After `n_pilot` paths per level, extra paths are run until each level has
+        N_l = ⌈2 ε⁻² √(V_l / C_l) Σ_k √(V_k C_k)⌉ (variance ≤ ε²/2), then the bias
+        |E[Y_L]| / (M^α − 1) is checked against ε/√2 and a level is added if needed.
+        α, the weak order, is fitted from the level means unless given (≥ 0.5).
+
+        'bias' only measures the time-step error between levels. Errors that don't
+        vanish as dt → 0 — the tenor-grid discretization (e.g. the O(Δx) diffusion of
+        the 'shift' step), the short-end stub of the bond integrals — are not in it.
+
+        Returns a dict with
+            'pv', 'se'          (n_trades,)  telescoped per-trade PV and standard error
+            'total', 'total_se' float        portfolio PV and standard error
+            'bias'              float        estimated discretization bias of 'total'
+            'converged'         bool         bias ≤ rmse/√2 within max_levels
+            'levels'            list         per level: steps, n_paths, mean, var, cost per path
+            'cost'              int          path-steps simulated, fine plus coupled coarse
+        """
+        if rmse <= 0:
+            raise ValueError("rmse must be positive.")
+        if refine < 2 or not 1 <= min_levels <= max_levels or n_pilot < 2 or batch_paths < 2:
+            raise ValueError("Need refine ≥ 2, 1 ≤ min_levels ≤ max_levels, n_pilot ≥ 2, batch_paths ≥ 2.")
+
+        book = as_book(insts)
+        sim = self.simulator
+        if sim.advection == "shift":
+            grids = [self.time_grid(book, base_steps_per_year)]
+        else:
+            h_min = float(np.diff(np.concatenate([[0.0], sim.tenors_yr])).min())
+            max_dt = h_min if base_steps_per_year is None else 1.0 / base_steps_per_year
+            grids = [event_grid(np.concatenate([book.fixing_time, book.pay_date]), max_dt=max_dt)]
+            if np.diff(grids[0]).max() > h_min * (1 + 1e-9):
+                raise ValueError(
+                    f"Level-0 steps up to {np.diff(grids[0]).max():.4g}y exceed the tenor spacing "
+                    f"{h_min:.4g}y; the 'gradient' Musiela step is unstable there. Raise "
+                    f"base_steps_per_year or use a simulator with advection='shift'."
+                )
+        stats: list[ColumnMoments] = []
+        cost = []
+
+        def add_level():
+            l = len(stats)
+            if l > 0:
+                grids.append(refine_grid(grids[-1], refine))
+            stats.append(ColumnMoments(len(book) + 1))          # per trade + the total
+            cost.append(len(grids[l]) - 1 + (len(grids[l - 1]) - 1 if l > 0 else 0))
+
+        def run(l, n):
+            for lo in range(0, n, batch_paths):
+                Y = self._mlmc_level(book, grids, l, refine, min(batch_paths, n - lo))
+                stats[l].update(np.column_stack([Y, Y.sum(axis=1)]))
+
+        while len(stats) < min_levels:
+            add_level()
+            run(len(stats) - 1, n_pilot)
+
+        while True:
+            V = np.array([max(s.var[-1], 0.0) for s in stats])
+            C = np.array(cost, dtype=float)
+            N_opt = np.ceil(2.0 / rmse ** 2 * np.sqrt(V / C) * np.sqrt(V * C).sum()).astype(int)
+            extra = N_opt - np.array([s.count for s in stats])
+            if np.any(extra > 0):
+                for l in np.flatnonzero(extra > 0):
+                    run(int(l), int(extra[l]))
+                continue
+
+            bias = self._mlmc_bias([s.mean[-1] for s in stats], refine, alpha)
+            if bias <= rmse / np.sqrt(2.0) or len(stats) >= max_levels:
+                break
+            add_level()
+            run(len(stats) - 1, n_pilot)
+
+        mean = np.sum([s.mean for s in stats], axis=0)
+        se = np.sqrt(np.sum([s.var / s.count for s in stats], axis=0))
+        return {
+            'pv': mean[:-1],
+            'se': se[:-1],
+            'total': float(mean[-1]),
+            'total_se': float(se[-1]),
+            'bias': float(bias),
+            'converged': bool(bias <= rmse / np.sqrt(2.0)),
+            'levels': [
+                {'steps': len(g) - 1, 'n_paths': s.count, 'mean': float(s.mean[-1]),
+                 'var': float(s.var[-1]), 'cost': c}
+                for g, s, c in zip(grids, stats, cost)
+            ],
+            'cost': int(sum(s.count * c for s, c in zip(stats, cost))),
+        }
+
+    def _mlmc_level(
+            self,
+            book: CapFloorBook,
+            grids: list[np.ndarray],
+            l: int,
+            refine: int,
+            n_paths: int,
+    ) -> np.ndarray:
+        """Y_l per path and trade, (n_paths, n_trades); the coarse path reuses the fine increments."""
+        sim = self.simulator
+        dt_f = np.diff(grids[l])
+        z = sim.rng.normal(size=(len(dt_f), n_paths, sim.n_factors))
+        Y = self._grid_pv(book, grids[l], n_paths, noise=z)
+        if l > 0:
+            dt_c = np.diff(grids[l - 1])
+            dW = (z * np.sqrt(dt_f)[:, None, None]).reshape(len(dt_c), refine, n_paths, sim.n_factors)
+            z_c = dW.sum(axis=1) / np.sqrt(dt_c)[:, None, None]
+            Y -= self._grid_pv(book, grids[l - 1], n_paths, noise=z_c)
+        return Y
+
+    @staticmethod
+    def _mlmc_bias(level_means: Sequence[float], refine: int, alpha: Optional[float]) -> float:
+        """|E[Y_L]| / (M^α − 1), also checking the previous level scaled down by M^α."""
+        m = np.abs(np.asarray(level_means[1:], dtype=float))
+        if len(m) == 0:
+            return float('inf')
+        if alpha is None:
+            alpha = 1.0
+            if len(m) >= 2 and np.all(m > 0):
+                # log_M |E[Y_l]| ≈ c − α l
+                alpha = max(0.5, -np.polyfit(np.arange(len(m)), np.log(m) / np.log(refine), 1)[0])
+        M_a = refine ** alpha
+        tail = m[-1] if len(m) == 1 else max(m[-1], m[-2] / M_a)
+        return float(tail / (M_a - 1.0))
+
+    def _grid_pv(
+            self,
+            book: CapFloorBook,
+            times: np.ndarray,
+            n_paths: int,
+            noise: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Simulate on `times` and return the (n_paths, n_trades) discounted payoffs."""
+        paths = self.simulator.simulate_on_grid(times, n_paths=n_paths, Musiela=True, noise=noise)
+        df_paths = self._bank_account_dfs(paths, np.diff(times))
+        return self._pathwise_pv(book, paths, df_paths, times)
+
+    def _pathwise_pv(
+            self,
+            book: CapFloorBook,
+            paths: np.ndarray,
+            df_paths: np.ndarray,
+            times: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Discounted payoff of every trade on every path, shape (n_paths, n_trades).
+
+        The schedules are merged first: L is computed once per distinct
+        (fixing step, accrual) pair and shared by every caplet that needs it, then
+        payoffs are evaluated in chunks of whole trades and reduced per trade.
+        """
+        offsets, n_trades = book.offsets, len(book)
+        fix_idx = locate(times, book.fixing_time)
+        pay_idx = locate(times, book.pay_date)
+        delta_yr = book.end - book.start
+        strike = book.per_caplet(book.strike)
+        sign = book.per_caplet(book.sign)
+        scale = book.per_caplet(book.notional) * book.accrual
+
+        # Distinct (fixing step, accrual) pairs → one L each, from one bond-surface gather.
+        fix_steps, fix_slot = np.unique(fix_idx, return_inverse=True)
+        uniq, inverse = np.unique(np.stack([fix_slot.ravel(), delta_yr], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        surface = ZCBSurface.from_paths(paths, fix_steps, self.simulator.tenors_yr, max_tenor=delta_yr.max())
+        L_uniq = surface.simple_forwards(uniq[:, 0].astype(int), uniq[:, 1])
+
+        pv_paths = np.empty((paths.shape[0], n_trades))
+        t_lo = 0
+        while t_lo < n_trades:
+            # Grow the chunk by whole trades so reduceat never splits a schedule.
+            t_hi = int(np.searchsorted(offsets, offsets[t_lo] + CASHFLOW_CHUNK, side='right')) - 1
+            t_hi = min(max(t_hi, t_lo + 1), n_trades)
+            lo, hi = offsets[t_lo], offsets[t_hi]
+
+            payoff = np.maximum(sign[lo:hi] * (L_uniq[:, inverse[lo:hi]] - strike[lo:hi]), 0.0)
+            payoff *= scale[lo:hi] * df_paths[:, pay_idx[lo:hi]]
+            pv_paths[:, t_lo:t_hi] = np.add.reduceat(payoff, offsets[t_lo:t_hi] - lo, axis=1)
+            t_lo = t_hi
+
+        return pv_paths
+
+    @staticmethod
+    def _summarize(pv_paths: np.ndarray, return_cov: bool = False) -> dict:
+        n_paths = pv_paths.shape[0]
+        total_paths = pv_paths.sum(axis=1)
+        res = {
+            'pv': pv_paths.mean(axis=0),
+            'se': pv_paths.std(axis=0, ddof=1) / np.sqrt(n_paths),
+            'total': float(total_paths.mean()),
+            'total_se': float(total_paths.std(ddof=1) / np.sqrt(n_paths)),
+        }
+        if return_cov:
+            res['cov'] = np.atleast_2d(np.cov(pv_paths, rowvar=False)) / n_paths
+        return res
+
+    def greeks(
+            self,
+            inst: CapFloor,
+            n_paths: int = 5000,
+            steps_per_year: int = 12,
+            vega_method: str = "pathwise",
+            buckets: Optional[Sequence[int]] = None,
+    ) -> dict:
+        """
+        PV, f0 deltas and factor vegas from a single simulation.
+
+        delta[i] = ∂PV/∂f0(x_i), or summed over nodes per bucket if `buckets` (tenor
+                   edges in months) is given; bucket b holds edges[b] < x ≤ edges[b+1].
+        vega[j]  = ∂PV/∂ε_j for the relative scaling σ_j → (1 + ε_j) σ_j.
+
+        Deltas are pathwise. Vegas are pathwise by default; `vega_method="lr"` moves
+        the diffusion part onto the likelihood-ratio score Σ_k (Z_kj² − 1), which
+        never differentiates through the caplet kink, while the deterministic 2α_j
+        drift term stays pathwise.
+
+        The adjoint recursions need a time-homogeneous one-step propagator, so greeks
+        keep the uniform 1/steps_per_year grid with dates rounded to it.
+
+        Returns a dict with 'pv', 'se', 'delta', 'delta_se', 'vega', 'vega_se'.
+        """
+        if vega_method not in ("pathwise", "lr"):
+            raise ValueError(f"Unknown vega_method '{vega_method}'. Supported: 'pathwise', 'lr'.")
+
+        sim = self.simulator
         T_max = max(cf.pay_date for cf in inst.schedule)
         dt = 1.0 / steps_per_year
+        sqrt_dt = np.sqrt(dt)
         n_steps = int(np.ceil(T_max * steps_per_year)) + 1  # +1 buffer for rounding
 
-        paths = self.simulator.simulate(
-            dt=dt, n_steps=n_steps, n_paths=n_paths, Musiela=True,
-        )
+        # Same stream simulate() would draw step by step; kept for the adjoint contractions.
+        Z = sim.rng.normal(size=(n_steps, n_paths, sim.n_factors))
+        paths = sim.simulate(dt=dt, n_steps=n_steps, n_paths=n_paths, Musiela=True, noise=Z)
         df_paths = self._bank_account_dfs(paths, dt)
 
+        # One-step propagator A (I + dt·D for the np.gradient operator D, or the shift).
+        A = sim.transport_matrix(dt)
+        sig, alpha = sim.vol_loadings, sim._factor_convex_drift
+
+        # r_m = e_0ᵀ Aᵐ: sensitivity of the short rate at step m to f0.
+        R = self._row_powers(np.eye(sim.n_tenors)[0], A, n_steps)
+        cumR = np.cumsum(R, axis=0)
+        R_sig, R_alpha = R @ sig, R @ alpha
+        cumR_sig, cumR_alpha = cumR @ sig, cumR @ alpha
+        U_cache: dict = {}
+
         pv = np.zeros(n_paths)
-        for cf in inst.schedule:
-            fix_idx = int(round(cf.fixing_time * steps_per_year))
+        delta = np.zeros((n_paths, sim.n_tenors))
+        vega = np.zeros((n_paths, sim.n_factors))
+        score = np.cumsum(Z ** 2 - 1.0, axis=0)  # score[k] = Σ_{m≤k} (Z_m² − 1)
+
+        fix_steps = np.array([int(round(cf.fixing_time * steps_per_year)) for cf in inst.schedule])
+        accruals = np.array([cf.end - cf.start for cf in inst.schedule])
+        surface = ZCBSurface.from_paths(paths, fix_steps, sim.tenors_yr, max_tenor=accruals.max())
+        L_all = surface.simple_forwards(np.arange(len(fix_steps)), accruals)
+
+        for i, cf in enumerate(inst.schedule):
+            fix_idx = int(fix_steps[i])
             pay_idx = int(round(cf.pay_date * steps_per_year))
+            delta_yr = float(accruals[i])
 
-            L = self._simply_compounded_fwd(paths, fix_idx, cf.end - cf.start)
+            L = L_all[:, i]
             payoff = np.maximum(inst.sign * (L - inst.strike), 0.0)
-            pv += inst.notional * cf.accrual * df_paths[:, pay_idx] * payoff
+            itm = inst.sign * (L - inst.strike) > 0.0
+            disc = inst.notional * cf.accrual * df_paths[:, pay_idx]
+            pv_cf = disc * payoff
+            pv += pv_cf
 
-        mean = float(pv.mean())
-        se = float(pv.std(ddof=1) / np.sqrt(n_paths))
-        return {'pv': mean, 'se': se} if return_se else mean
+            # ∂pv/∂(∫r) and ∂pv/∂(∫f dx) per path; dL/dI = e^I / Δ = (1 + ΔL) / Δ.
+            coef_df = -pv_cf
+            coef_L = disc * inst.sign * itm * (1.0 + delta_yr * L) / delta_yr
 
-    def _simply_compounded_fwd(
-            self,
-            paths: np.ndarray,
-            fix_idx: int,
-            delta_yr: float,
-    ) -> np.ndarray:
-        """
-        L = (1 / P(T_fix; T_end) − 1) / Δ from the simulated curve.
-        Augments the [0, 1/12] gap by flat-extrapolating f(t, 0) ≈ f(t, x_min);
-        bias is O(slope · 1/12), small for monthly grids.
-        """
-        sim = self.simulator
-        delta_months = int(round(delta_yr * 12))
-        if delta_months < 1 or delta_months > sim.n_tenors:
-            raise ValueError(
-                f"accrual {delta_yr} yr → {delta_months}M is outside tenor grid (1..{sim.n_tenors}M)."
-            )
-
-        f_first = paths[:, fix_idx, :1]                                   # f(T_fix, x_min) as f(T_fix, 0)
-        f_grid = paths[:, fix_idx, :delta_months]                         # (n_paths, delta_months)
-        f_aug = np.concatenate([f_first, f_grid], axis=1)                 # (n_paths, delta_months + 1)
-        x_aug = np.concatenate([[0.0], sim.tenors_yr[:delta_months]])     # (delta_months + 1,)
-
-        integral = np.trapz(f_aug, x_aug, axis=1)
-        P = np.exp(-integral)
-        return (1.0 / P - 1.0) / delta_yr
-
-    def _bank_account_dfs(self, paths: np.ndarray, dt: float) -> np.ndarray:
+            # u_m = wᵀ Aᵐ for the L integral weights w, cached per accrual.
+            if delta_yr not in U_cache:
+                w = ZCBSurface.tenor_weights(sim.tenors_yr, delta_yr)[0]
+                U = self._row_powers(w, A, n_steps)
+                U_cache[delta_yr] = (U, U @ sig, U @ alpha)
+            U, U_sig, U_alpha = U_cache[delta_yr]
+
+            c_pay = dt * (cumR[pay_idx] - 0.5 * R[0] - 0.5 * R[pay_idx])
+            delta += np.outer(coef_df, c_pay) + np.outer(coef_L, U[fix_idx])
+
+            # Adjoint kernels: response of ∫r to the step-k increment, k < pay_idx, and
+            # of the L integral to the step-k increment, k < fix_idx (index reversed).
+            k_pay = dt * (cumR_sig[pay_idx - 1::-1] - 0.5 * R_sig[pay_idx - 1::-1])
+            d_pay = 2.0 * dt * dt * (cumR_alpha[pay_idx - 1::-1] - 0.5 * R_alpha[pay_idx - 1::-1]).sum(axis=0)
+            k_fix = U_sig[fix_idx - 1::-1] if fix_idx > 0 else np.zeros((0, sim.n_factors))
+            d_fix = 2.0 * dt * U_alpha[:fix_idx].sum(axis=0)
+
+            vega += np.outer(coef_df, d_pay) + np.outer(coef_L, d_fix)
+            if vega_method == "pathwise":
+                vega += coef_df[:, None] * sqrt_dt * np.einsum('kpj,kj->pj', Z[:pay_idx], k_pay)
+                vega += coef_L[:, None] * sqrt_dt * np.einsum('kpj,kj->pj', Z[:fix_idx], k_fix)
+            elif pay_idx > 0:
+                vega += pv_cf[:, None] * score[pay_idx - 1]
+
+        if buckets is not None:
+            edges = np.asarray(buckets)
+            which = np.digitize(sim.tenors_m, edges, right=True) - 1
+            keep = (which >= 0) & (which < len(edges) - 1)
+            B = np.zeros((sim.n_tenors, len(edges) - 1))
+            B[np.flatnonzero(keep), which[keep]] = 1.0
+            delta = delta @ B
+
+        root_n = np.sqrt(n_paths)
+        return {
+            'pv': float(pv.mean()),
+            'se': float(pv.std(ddof=1) / root_n),
+            'delta': delta.mean(axis=0),
+            'delta_se': delta.std(axis=0, ddof=1) / root_n,
+            'vega': vega.mean(axis=0),
+            'vega_se': vega.std(axis=0, ddof=1) / root_n,
+        }
+
+    @staticmethod
+    def _row_powers(v: np.ndarray, A: np.ndarray, n: int) -> np.ndarray:
+        """Rows v Aᵐ for m = 0..n, shape (n + 1, len(v))."""
+        out = np.empty((n + 1, len(v)))
+        out[0] = v
+        for m in range(n):
+            out[m + 1] = out[m] @ A
+        return out
+
+    def _bank_account_dfs(self, paths: np.ndarray, dt: Union[float, np.ndarray]) -> np.ndarray:
         """
         DF(t_n) = exp(-∫_0^{t_n} r(s) ds), trapezoid in time, with r(s) ≈ f(s, x_min).
+        `dt` is the step length or the (n_steps,) per-step lengths.
         Returns (n_paths, n_steps + 1) with DF(t_0) = 1.
         """
         short = paths[:, :, 0]                                   # (n_paths, n_steps + 1)
@@ -0,0 +1,175 @@
+"""
+Batched implied-volatility inversion for the Black and Bachelier caplet formulas.
+
+Both solvers work on whole arrays of undiscounted option prices (per unit notional and
+accrual, i.e. what `black_call` / `bachelier_call` return). Each quote is first
+converted to its out-of-the-money side by put-call parity, so deep ITM premiums do not
+lose precision to the intrinsic value. Then:
+
+    1. a closed-form initial guess (Corrado–Miller for Black, the ATM-exact
+       σ ≈ √(2π/T) · (C_otm + |F − K| / 2) for Bachelier),
+    2. a few Halley (third-order Householder) steps on ln(price) using vega and
+       volga — the log objective keeps deep OTM quotes well conditioned — safeguarded
+       by a per-quote bracket [lo, hi]: a step that leaves the bracket is replaced by
+       bisection.
+
+Returns (vol, converged). Quotes outside the no-arbitrage bounds, with T ≤ 0, or whose
+OTM value is lost to rounding in the parity conversion come back as NaN with
+converged = False. A price exactly at intrinsic returns vol 0.
+"""
+from math import pi, sqrt
+from typing import Callable
+
+import numpy as np
+
+from pricers._helpers import norm_cdf_array, norm_pdf_array
+
+PayoffSpec = str  # 'call' / 'put', or an array of them
+
+
+def black_implied_vol(
+        price,
+        F,
+        K,
+        T,
+        payoff: PayoffSpec = "call",
+        tol: float = 1e-10,
+        max_iter: int = 20,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Lognormal vols with black_call/black_put(F, K, vol, T) == price."""
+    price, F, K, T, is_call = _prepare(price, F, K, T, payoff)
+    valid = (F > 0) & (K > 0)
+    F_s, K_s = np.where(valid, F, 1.0), np.where(valid, K, 1.0)
+
+    # Out-of-the-money price: calls above the forward, puts below.
+    otm_call = K_s >= F_s
+    target = np.where(is_call == otm_call, price, price + np.where(is_call, -1.0, 1.0) * (F_s - K_s))
+    upper = np.where(otm_call, F_s, K_s)
+    valid &= (T > 0) & (target >= 0) & (target < upper)
+    valid &= _resolvable(target, price, F_s - K_s, is_call != otm_call)
+
+    sqrt_T = np.sqrt(np.where(T > 0, T, 1.0))
+    ln_fk = np.log(F_s / K_s)
+
+    def otm_price(sigma):
+        s = np.maximum(sigma, 1e-300) * sqrt_T
+        d1 = ln_fk / s + 0.5 * s
+        d2 = d1 - s
+        call = F_s * norm_cdf_array(d1) - K_s * norm_cdf_array(d2)
+        put = K_s * norm_cdf_array(-d2) - F_s * norm_cdf_array(-d1)
+        vega = F_s * norm_pdf_array(d1) * sqrt_T
+        volga = vega * d1 * d2 / np.maximum(sigma, 1e-300)
+        return np.where(otm_call, call, put), vega, volga
+
+    # Corrado–Miller rational guess from the call price.
+    call_px = np.where(otm_call, target, target + F_s - K_s)
+    a = call_px - 0.5 * (F_s - K_s)
+    guess = sqrt(2.0 * pi) / ((F_s + K_s) * sqrt_T) * (
+        a + np.sqrt(np.maximum(a * a - (F_s - K_s) ** 2 / pi, 0.0))
+    )
+    hi = np.full(price.shape, 5.0)
+    return _solve(otm_price, target, guess, hi, valid, tol, max_iter)
+
+
+def bachelier_implied_vol(
+        price,
+        F,
+        K,
+        T,
+        payoff: PayoffSpec = "call",
+        tol: float = 1e-10,
+        max_iter: int = 20,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Normal (absolute) vols with bachelier_call/bachelier_put(F, K, vol, T) == price."""
+    price, F, K, T, is_call = _prepare(price, F, K, T, payoff)
+    otm_call = K >= F
+    target = np.where(is_call == otm_call, price, price + np.where(is_call, -1.0, 1.0) * (F - K))
+    valid = (T > 0) & (target >= 0) & _resolvable(target, price, F - K, is_call != otm_call)
+
+    sqrt_T = np.sqrt(np.where(T > 0, T, 1.0))
+    m = np.abs(F - K)
+
+    def otm_price(sigma):
+        s = np.maximum(sigma, 1e-300) * sqrt_T
+        d = -m / s
+        pdf = norm_pdf_array(d)
+        vega = sqrt_T * pdf
+        volga = vega * d * d / np.maximum(sigma, 1e-300)
+        return -m * norm_cdf_array(d) + s * pdf, vega, volga
+
+    guess = sqrt(2.0 * pi) / sqrt_T * (target + 0.5 * m)
+    # OTM price ≥ σ√T·φ(0) − |F − K| (price is 1-Lipschitz in strike), so hi brackets the root.
+    hi = sqrt(2.0 * pi) / sqrt_T * (target + m) + 1e-12
+    return _solve(otm_price, target, guess, hi, valid, tol, max_iter)
+
+
+def _prepare(price, F, K, T, payoff):
+    price, F, K, T, payoff = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(F, dtype=float),
+        np.asarray(K, dtype=float), np.asarray(T, dtype=float), np.asarray(payoff),
+    )
+    if not np.all(np.isin(payoff, ("call", "put"))):
+        raise ValueError("payoff must be 'call' or 'put'.")
+    return price, F, K, T, payoff == "call"
+
+
+def _resolvable(target, price, fwd_minus_strike, converted) -> np.ndarray:
+    """False where parity left the OTM value below the rounding noise of the ITM quote."""
+    noise = 4.0 * np.finfo(float).eps * np.maximum(np.abs(price), np.abs(fwd_minus_strike))
+    return ~converted | (target == 0.0) | (target > noise)
+
+
+def _solve(
+        otm_price: Callable,
+        target: np.ndarray,
+        guess: np.ndarray,
+        hi: np.ndarray,
+        valid: np.ndarray,
+        tol: float,
+        max_iter: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Safeguarded Halley on ln price(σ) (price increasing in σ); relative price tolerance tol."""
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore", under="ignore"):
+        return _halley(otm_price, target, guess, hi, valid, tol, max_iter)
+
+
+def _halley(otm_price, target, guess, hi, valid, tol, max_iter):
+    lo = np.zeros(target.shape)
+    hi = hi.copy()
+    # Grow hi until it brackets the root (Black only; Bachelier's bound is exact).
+    for _ in range(8):
+        short = valid & (otm_price(hi)[0] < target)
+        if not short.any():
+            break
+        hi = np.where(short, 4.0 * hi, hi)
+
+    sigma = np.clip(np.where(np.isfinite(guess), guess, 0.5 * hi), 0.0, hi)
+    sigma = np.where((sigma <= lo) | (sigma >= hi), 0.5 * (lo + hi), sigma)
+    zero_tv = valid & (target <= 0.0)
+    sigma = np.where(zero_tv, 0.0, sigma)
+
+    log_target = np.log(np.where(target > 0, target, 1.0))
+    done = zero_tv | ~valid
+    for _ in range(max_iter):
+        px, vega, volga = otm_price(sigma)
+        f = np.log(px) - log_target
+        done |= np.abs(f) <= tol
+        if done.all():
+            break
+
+        lo = np.where(f < 0, sigma, lo)
+        hi = np.where(f > 0, sigma, hi)
+        # g = ln px: g' = vega/px, g'' = volga/px − g'².
+        g1 = vega / px
+        g2 = volga / px - g1 * g1
+        newton = f / g1
+        denom = 1.0 - 0.5 * newton * g2 / g1
+        step = np.where(np.isfinite(denom) & (denom > 0.5), newton / denom, newton)
+        cand = sigma - step
+        bad = ~np.isfinite(cand) | (cand <= lo) | (cand >= hi)
+        cand = np.where(bad, 0.5 * (lo + hi), cand)
+        sigma = np.where(done, sigma, cand)
+
+    px = otm_price(sigma)[0]
+    converged = valid & (zero_tv | (np.abs(px - target) <= 2.0 * tol * target))
+    return np.where(valid, sigma, np.nan), converged
@@ -7,37 +7,78 @@ exposes the two methods the closed-form pricers consume:
     df(t_yr)                     → P(0, t)
     forward(t_start, t_end)      → simply-compounded F over [t_start, t_end]
 
+plus array counterparts `dfs` / `forwards` for the book-level engines, and their
+Jacobians `df_jacobian` / `forward_jacobian` with respect to the knot inputs.
+
+Jacobians: a natural cubic spline is linear in its knot values, ln P(t) = Σ_k B_k(t) ln P_k,
+so ∂ln P(t)/∂ln P_k = B_k(t) (the spline through unit vectors). Given the bootstrap
+Jacobian ∂P_k/∂y (`from_par_yields`), sensitivities to quoted par yields follow by the
+chain rule, with no rebuilds.
+
 Interpolation: cubic spline on log(DF), same convention as the instantaneous-forward
 curve construction, so DF and forward are mutually consistent.
 """
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import numpy as np
-import pandas as pd
-from scipy.interpolate import CubicSpline
 
 from data.term_data import TermStructureData
 
+if TYPE_CHECKING:
+    from scipy.interpolate import CubicSpline
+
 
 class DiscountCurve:
-    def __init__(self, knot_tenors_yr: np.ndarray, knot_dfs: np.ndarray):
+    def __init__(
+            self,
+            knot_tenors_yr: np.ndarray,
+            knot_dfs: np.ndarray,
+            knot_jacobian: Optional[np.ndarray] = None,
+    ):
+        """
+        knot_jacobian: optional (n_knots, n_inputs) ∂knot_dfs/∂inputs, e.g. from
+                       `bootstrap_discount_factors(..., return_jacobian=True)`. Without it,
+                       the Jacobians are taken with respect to the knot DFs themselves.
+        """
         knot_tenors_yr = np.asarray(knot_tenors_yr, dtype=float)
         knot_dfs = np.asarray(knot_dfs, dtype=float)
         if not np.all(np.diff(knot_tenors_yr) > 0):
             raise ValueError("knot_tenors_yr must be strictly increasing.")
         if np.any(knot_dfs <= 0):
             raise ValueError("DFs must be strictly positive.")
+        from scipy.interpolate import CubicSpline
+
+        if knot_jacobian is None:
+            knot_jacobian = np.eye(len(knot_dfs))
+        knot_jacobian = np.asarray(knot_jacobian, dtype=float)
+        if knot_jacobian.ndim != 2 or knot_jacobian.shape[0] != len(knot_dfs):
+            raise ValueError("knot_jacobian must have shape (n_knots, n_inputs).")
+        # ∂ln P_k / ∂input, one row per knot.
+        dlog_knots = knot_jacobian / knot_dfs[:, None]
         # Anchor df(0) ≡ 1 — without this, natural-BC extrapolation lets df(0)
         # drift away from 1 and biases every short-end forward.
         if knot_tenors_yr[0] > 0:
             knot_tenors_yr = np.concatenate([[0.0], knot_tenors_yr])
             knot_dfs = np.concatenate([[1.0], knot_dfs])
+            dlog_knots = np.vstack([np.zeros(dlog_knots.shape[1]), dlog_knots])
         self._knot_yr = knot_tenors_yr
         self._spline = CubicSpline(knot_tenors_yr, np.log(knot_dfs), bc_type="natural")
+        self._dlog_knots = dlog_knots
+        self._basis: Optional["CubicSpline"] = None
+
+    @classmethod
+    def from_par_yields(cls, tenors_m: np.ndarray, par_yields: np.ndarray) -> "DiscountCurve":
+        """Bootstrap one date of par yields; Jacobians are then w.r.t. the par yields."""
+        from rates.forward_curve import bootstrap_par_yields
+
+        knot_dfs, jac = bootstrap_par_yields(tenors_m, par_yields, return_jacobian=True)
+        return cls(np.asarray(tenors_m, dtype=float) / 12.0, knot_dfs, jac)
 
     @classmethod
     def from_tsd(cls, df_tsd: TermStructureData, date) -> "DiscountCurve":
         """Build from a row of `bootstrap_discount_factors` output."""
+        import pandas as pd
+
         tenors_yr = np.asarray(df_tsd.tenors, dtype=float) / 12.0
         row = df_tsd.to_dataframe().loc[pd.Timestamp(date)].values
         return cls(tenors_yr, row)
@@ -50,3 +91,37 @@ class DiscountCurve:
         if t_end_yr <= t_start_yr:
             raise ValueError(f"t_end ({t_end_yr}) must be > t_start ({t_start_yr}).")
         return (self.df(t_start_yr) / self.df(t_end_yr) - 1.0) / (t_end_yr - t_start_yr)
+
+    def dfs(self, t_yr: np.ndarray) -> np.ndarray:
+        return np.exp(self._spline(np.asarray(t_yr, dtype=float)))
+
+    def forwards(self, t_start_yr: np.ndarray, t_end_yr: np.ndarray) -> np.ndarray:
+        t_start_yr = np.asarray(t_start_yr, dtype=float)
+        t_end_yr = np.asarray(t_end_yr, dtype=float)
+        if np.any(t_end_yr <= t_start_yr):
+            raise ValueError("every t_end must be > its t_start.")
+        return (self.dfs(t_start_yr) / self.dfs(t_end_yr) - 1.0) / (t_end_yr - t_start_yr)
+
+    def _log_df_jacobian(self, t_yr: np.ndarray) -> np.ndarray:
+        """∂ln P(t)/∂input, shape (len(t), n_inputs)."""
+        if self._basis is None:
+            from scipy.interpolate import CubicSpline
+
+            n = len(self._knot_yr)
+            self._basis = CubicSpline(self._knot_yr, np.eye(n), bc_type="natural")
+        return self._basis(np.atleast_1d(np.asarray(t_yr, dtype=float))) @ self._dlog_knots
+
+    def df_jacobian(self, t_yr: np.ndarray) -> np.ndarray:
+        """∂df(t)/∂input, shape (len(t), n_inputs)."""
+        t_yr = np.atleast_1d(np.asarray(t_yr, dtype=float))
+        return self.dfs(t_yr)[:, None] * self._log_df_jacobian(t_yr)
+
+    def forward_jacobian(self, t_start_yr: np.ndarray, t_end_yr: np.ndarray) -> np.ndarray:
+        """∂forward(s, e)/∂input, shape (len(s), n_inputs)."""
+        t_start_yr = np.atleast_1d(np.asarray(t_start_yr, dtype=float))
+        t_end_yr = np.atleast_1d(np.asarray(t_end_yr, dtype=float))
+        if np.any(t_end_yr <= t_start_yr):
+            raise ValueError("every t_end must be > its t_start.")
+        # F = (P_s/P_e - 1)/τ  ⇒  dF = (P_s/P_e)/τ · (d ln P_s - d ln P_e)
+        ratio = self.dfs(t_start_yr) / self.dfs(t_end_yr) / (t_end_yr - t_start_yr)
+        return ratio[:, None] * (self._log_df_jacobian(t_start_yr) - self._log_df_jacobian(t_end_yr))
@@ -1,80 +1,128 @@
 from datetime import date as dt
 from typing import Optional
-import warnings
 
 import numpy as np
 from scipy.interpolate import CubicSpline, RBFInterpolator
 
 from data.loader import TermStructureLoader
 from data.term_data import TermStructureData
-from data.registry import DEFAULT_TERM_STRUCTURE_LOADER
-
-warnings.filterwarnings("ignore")
+from utils.instrumentation import instrumented
 
 SHORT_END_MONTHS = 12  # tenors <= 12M treated as continuously-compounded zero rates
 COUPON_FREQ_MONTHS = 6  # UST semi-annual coupon convention
 
 
-def _bootstrap_one_date(
+def bootstrap_par_yields(
         tenors_m: np.ndarray,
         par_yields: np.ndarray,
-) -> np.ndarray:
+        return_jacobian: bool = False,
+):
     """
-    Bootstrap discount factors at the quoted market tenors for a single date.
-
-    Returns DFs aligned with the input tenors_m.
+    Bootstrap discount factors at the quoted market tenors.
+
+    par_yields has shape (..., n_tenors); leading axes (dates, scenarios) are bootstrapped
+    together — the recursion runs over tenors once and every step is an array operation
+    across the batch. Returns DFs of the same shape. With return_jacobian=True, returns
+    (dfs, jac) where jac[..., i, k] = ∂dfs[..., i] / ∂par_yields[..., k], carried through
+    the recursion alongside the DFs: every interpolated coupon DF is log-linear in its
+    neighbours, so its gradient is the same interpolation applied to ∂ln P.
     """
     tenors_m = np.asarray(tenors_m, dtype=int)
     par_yields = np.asarray(par_yields, dtype=float)
 
     if not np.all(np.diff(tenors_m) > 0):
         raise ValueError("Tenors must be strictly increasing for bootstrap.")
+    if par_yields.shape[-1:] != tenors_m.shape:
+        raise ValueError(f"par_yields shape {par_yields.shape} doesn't end with {len(tenors_m)} tenors.")
 
     tenors_yr = tenors_m.astype(float) / 12.0
     n = len(tenors_m)
-    dfs = np.empty(n)
+    batch = par_yields.shape[:-1]
+    dfs = np.empty(batch + (n,))
+    jac = np.zeros(batch + (n, n)) if return_jacobian else None
 
-    # Working store of all known DFs, keyed by tenor in months (int).
-    known: dict[int, float] = {}
+    # Working store of all known ln DFs (and ∂ln P / ∂y), keyed by tenor in months (int).
+    # Which months are known depends only on the tenor grid, so one schedule serves the batch.
+    known: dict[int, np.ndarray] = {}
+    known_dlog: dict[int, np.ndarray] = {}
 
-    for i, (t_m, t_yr, y) in enumerate(zip(tenors_m, tenors_yr, par_yields)):
+    for i, (t_m, t_yr) in enumerate(zip(tenors_m, tenors_yr)):
+        y = par_yields[..., i]
         if t_m <= SHORT_END_MONTHS:
-            P = float(np.exp(-y * t_yr))
-            dfs[i] = P
-            known[int(t_m)] = P
+            known[int(t_m)] = -y * t_yr
+            dfs[..., i] = np.exp(known[int(t_m)])
+            if return_jacobian:
+                jac[..., i, i] = -t_yr * dfs[..., i]
+                known_dlog[int(t_m)] = jac[..., i, :] / dfs[..., i, None]
             continue
 
         # Long end: bootstrap with semi-annual coupons.
         coupon_months = np.arange(COUPON_FREQ_MONTHS, int(t_m), COUPON_FREQ_MONTHS)
 
-        sum_intermediate = 0.0
+        sum_intermediate = np.zeros(batch)
+        d_sum = np.zeros(batch + (n,)) if return_jacobian else None
         for cm in coupon_months:
             cm = int(cm)
             if cm not in known:
                 ks = np.array(sorted(known.keys()))
-                lnPs = np.log(np.array([known[m] for m in ks]))
                 # log-linear interp; flat extrapolation if cm sits outside known range
-                known[cm] = float(np.exp(np.interp(cm, ks, lnPs)))
-            sum_intermediate += known[cm]
+                w = _interp_weights(cm, ks)
+                nz = np.flatnonzero(w)
+                known[cm] = sum(w[j] * known[ks[j]] for j in nz)
+                if return_jacobian:
+                    known_dlog[cm] = sum(w[j] * known_dlog[ks[j]] for j in nz)
+            P_c = np.exp(known[cm])
+            sum_intermediate += P_c
+            if return_jacobian:
+                d_sum += P_c[..., None] * known_dlog[cm]
 
         P_T = (1.0 - (y / 2.0) * sum_intermediate) / (1.0 + y / 2.0)
-        dfs[i] = P_T
-        known[int(t_m)] = P_T
-
+        dfs[..., i] = P_T
+        known[int(t_m)] = np.log(P_T)
+        if return_jacobian:
+            # P_T (1 + y/2) = 1 - (y/2) S  ⇒  dP_T = -[(y/2) dS + (S + P_T)/2 dy] / (1 + y/2)
+            jac[..., i, :] = -(y / 2.0)[..., None] * d_sum / (1.0 + y / 2.0)[..., None]
+            jac[..., i, i] -= 0.5 * (sum_intermediate + P_T) / (1.0 + y / 2.0)
+            known_dlog[int(t_m)] = jac[..., i, :] / P_T[..., None]
+
+    if return_jacobian:
+        return dfs, jac
     return dfs
 
 
-def bootstrap_discount_factors(tsd: TermStructureData) -> TermStructureData:
+def _interp_weights(x: float, xp: np.ndarray) -> np.ndarray:
+    """Weights w with np.interp(x, xp, fp) == w @ fp for any fp (flat extrapolation)."""
+    w = np.zeros(len(xp))
+    if x <= xp[0]:
+        w[0] = 1.0
+    elif x >= xp[-1]:
+        w[-1] = 1.0
+    else:
+        j = int(np.searchsorted(xp, x))
+        lam = (x - xp[j - 1]) / (xp[j] - xp[j - 1])
+        w[j - 1], w[j] = 1.0 - lam, lam
+    return w
+
+
+@instrumented(unit="dates", count=lambda res, tsd, *a, **k: len(tsd.time))
+def bootstrap_discount_factors(tsd: TermStructureData, return_jacobian: bool = False):
     """
     Bootstrap discount factors at the quoted tenors for every date in the TSD.
     Output tenors are kept in months to stay consistent with the rest of the library.
+
+    With return_jacobian=True, also returns jac of shape (n_dates, n_tenors, n_tenors),
+    jac[d, i, k] = ∂DF_i / ∂par_yield_k on date d.
     """
     tenors_m = np.asarray(tsd.tenors, dtype=int)
-    out = np.empty_like(tsd.values, dtype=float)
-    for i, row in enumerate(tsd.values):
-        out[i] = _bootstrap_one_date(tenors_m, row)
+    if return_jacobian:
+        out, jac = bootstrap_par_yields(tenors_m, tsd.values, return_jacobian=True)
+    else:
+        out = bootstrap_par_yields(tenors_m, tsd.values)
 
-    return TermStructureData(time=tsd.time, tenors=tenors_m, values=out)
+    dfs = TermStructureData(time=tsd.time, tenors=tenors_m, values=out)
+    if return_jacobian:
+        return dfs, jac
+    return dfs
 
 
 def instantaneous_forwards_from_dfs(
@@ -88,7 +136,8 @@ def instantaneous_forwards_from_dfs(
  
     f(0, t) = -d/dt ln P(0, t)
  
-    Anchors at (t=0, df=1) by definition.
+    Anchors at (t=0, df=1) by definition. knot_dfs may carry leading batch axes,
+    (..., n_knots) → (..., n_targets).
  
     Parameters
     ----------
@@ -101,23 +150,23 @@ def instantaneous_forwards_from_dfs(
     knot_dfs = np.asarray(knot_dfs, dtype=float)
     if knot_yr[0] > 0:
         knot_yr = np.concatenate([[0.0], knot_yr])
-        knot_dfs = np.concatenate([[1.0], knot_dfs])
+        knot_dfs = np.concatenate([np.ones(knot_dfs.shape[:-1] + (1,)), knot_dfs], axis=-1)
  
     log_dfs = np.log(knot_dfs)
     target_yr = np.asarray(target_tenors_m, dtype=float) / 12.0
  
     if interp_method == "cubic_spline":
-        spline = CubicSpline(knot_yr, log_dfs, bc_type="natural")
+        spline = CubicSpline(knot_yr, log_dfs, axis=-1, bc_type="natural")
         return -spline.derivative()(target_yr)
  
     elif interp_method == "rbf":
         rbf = RBFInterpolator(
             knot_yr.reshape(-1, 1),
-            log_dfs,
+            log_dfs.reshape(-1, len(knot_yr)).T,
             kernel="thin_plate_spline",
         )
-        target_log_dfs = rbf(target_yr.reshape(-1, 1)).ravel()
-        return -np.gradient(target_log_dfs, target_yr)
+        target_log_dfs = rbf(target_yr.reshape(-1, 1)).T.reshape(log_dfs.shape[:-1] + target_yr.shape)
+        return -np.gradient(target_log_dfs, target_yr, axis=-1)
  
     else:
         raise ValueError(
@@ -126,6 +175,7 @@ def instantaneous_forwards_from_dfs(
         )
 
 
+@instrumented(unit="dates", count=lambda res, tsd, *a, **k: len(tsd.time))
 def build_forward_curve(
         tsd: TermStructureData,
         target_tenors_m: Optional[np.ndarray] = None,
@@ -139,12 +189,8 @@ def build_forward_curve(
         target_tenors_m = np.arange(int(tenors_m[0]), int(tenors_m[-1]) + 1)
     target_tenors_m = np.asarray(target_tenors_m, dtype=int)
 
-    n_dates = len(tsd.time)
-    fwd = np.empty((n_dates, len(target_tenors_m)))
-
-    for i, row in enumerate(tsd.values):
-        knot_dfs = _bootstrap_one_date(tenors_m, row)
-        fwd[i] = instantaneous_forwards_from_dfs(tenors_m, knot_dfs, target_tenors_m)
+    knot_dfs = bootstrap_par_yields(tenors_m, tsd.values)
+    fwd = instantaneous_forwards_from_dfs(tenors_m, knot_dfs, target_tenors_m)
 
     return TermStructureData(
         time=tsd.time,
@@ -156,15 +202,20 @@ def build_forward_curve(
 class ForwardCurve:
     def __init__(
             self,
-            loader: TermStructureLoader = DEFAULT_TERM_STRUCTURE_LOADER,
+            loader: Optional[TermStructureLoader] = None,
             sdate: dt = None,
             edate: dt = None,
     ):
+        """loader defaults to `data.registry.DEFAULT_TERM_STRUCTURE_LOADER` (FRED)."""
+        if loader is None:
+            from data.registry import DEFAULT_TERM_STRUCTURE_LOADER
+            loader = DEFAULT_TERM_STRUCTURE_LOADER
         self.loader = loader
         self.sdate = sdate
         self.edate = edate
         self.curve: Optional[TermStructureData] = None
 
+    @instrumented("ForwardCurve.compute", unit="dates", count=lambda res, self: len(res.time))
     def compute(self) -> TermStructureData:
         if self.curve is None:
             par_yields = self.loader.load(self.sdate, self.edate)
@@ -0,0 +1,353 @@
+"""
+Batched scenario repricing of a cap/floor book.
+
+A `ScenarioSet` holds n_scen shocks as tensors, one row per scenario:
+
+    par_shift   (n_scen, n_par_tenors)   additive par-yield shifts, decimal (1 column = parallel)
+    fwd_shift   (n_scen, n_fwd_tenors)   additive shifts of the instantaneous forward curve on
+                                         `fwd_tenors_m`, e.g. PCA factor moves Δf = V a
+    vol_scale   (n_scen, n_factors)      multiplicative vol scaling (1 column = every factor)
+
+`ScenarioEngine` applies a set to one date's market state in bulk. All shocked par curves
+are bootstrapped together (`bootstrap_par_yields` runs the recursion once across the
+batch), forward shifts enter as ln P(T) -= ∫_0^T Δf, and the result is one
+(n_scen, n_knots) matrix of log-DF knots. The natural spline on ln P is linear in its
+knots, so DFs and forwards at every caplet date for every scenario come from a single
+product with the spline basis (`ScenarioCurves`), and the Black/Bachelier engines price
+the whole (n_scen, n_caplets) grid by broadcasting — no per-scenario curve or engine
+rebuild. Large batches are processed in scenario chunks of bounded size.
+
+Model engines see the same shocks as f0 shifts on their tenor grid plus loading scales:
+the Gaussian HJM closed form reuses its per-factor variance integrals across scenarios,
+and the Monte Carlo engine reruns each scenario on the same seed, so scenario P&L is
+measured with common random numbers.
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from instruments.book import CapFloorBook, as_book
+from instruments.capsfloors import CapFloor
+from pricers._helpers import bulk_vols
+from pricers.capfloor_gaussian_hjm import _PiecewiseLinearIntegral
+from rates.forward_curve import _interp_weights, bootstrap_par_yields, instantaneous_forwards_from_dfs
+from utils.instrumentation import instrumented
+from volatility.pca_result import PCAResult
+
+# Upper bound on n_scen_chunk × n_caplets per broadcast pricing pass.
+SCENARIO_CHUNK_ELEMENTS = 4_000_000
+
+
+@dataclass(frozen=True)
+class ScenarioSet:
+    names: Sequence[str]
+    par_shift: Optional[np.ndarray] = None
+    fwd_shift: Optional[np.ndarray] = None
+    fwd_tenors_m: Optional[np.ndarray] = None
+    vol_scale: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        n = len(self.names)
+        if n == 0:
+            raise ValueError("A scenario set needs at least one scenario.")
+        object.__setattr__(self, "names", list(self.names))
+        for attr in ("par_shift", "fwd_shift", "vol_scale"):
+            val = getattr(self, attr)
+            if val is None:
+                continue
+            val = np.asarray(val, dtype=float)
+            if val.ndim == 1:
+                val = val[:, None]
+            if val.ndim != 2 or len(val) != n:
+                raise ValueError(f"{attr} must have shape ({n}, k), got {val.shape}.")
+            object.__setattr__(self, attr, val)
+        if (self.fwd_shift is None) != (self.fwd_tenors_m is None):
+            raise ValueError("fwd_shift and fwd_tenors_m go together.")
+        if self.fwd_shift is not None:
+            tenors = np.asarray(self.fwd_tenors_m, dtype=int)
+            if tenors.shape != self.fwd_shift.shape[1:]:
+                raise ValueError("fwd_shift columns must match fwd_tenors_m.")
+            object.__setattr__(self, "fwd_tenors_m", tenors)
+        if self.vol_scale is not None and np.any(self.vol_scale < 0):
+            raise ValueError("vol_scale must be non-negative.")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # ------------------------------------------------------------------ builders
+
+    @classmethod
+    def base(cls) -> "ScenarioSet":
+        return cls(names=["base"])
+
+    @classmethod
+    def parallel(cls, shifts_bp: Sequence[float]) -> "ScenarioSet":
+        """One parallel par-yield shift per scenario, in bp."""
+        shifts_bp = np.asarray(shifts_bp, dtype=float)
+        return cls(names=[f"parallel_{s:+g}bp" for s in shifts_bp], par_shift=shifts_bp * 1e-4)
+
+    @classmethod
+    def bucketed(cls, par_tenors_m: Sequence[int], size_bp: float = 1.0) -> "ScenarioSet":
+        """One scenario per quoted tenor, bumping only that par yield by size_bp."""
+        par_tenors_m = np.asarray(par_tenors_m, dtype=int)
+        return cls(
+            names=[f"bucket_{t}M_{size_bp:+g}bp" for t in par_tenors_m],
+            par_shift=np.eye(len(par_tenors_m)) * size_bp * 1e-4,
+        )
+
+    @classmethod
+    def pca(
+            cls,
+            pca: PCAResult,
+            amplitudes: np.ndarray,
+            horizon_days: Optional[int] = None,
+    ) -> "ScenarioSet":
+        """
+        Forward-curve moves along the PCA eigenvectors, Δf = V a, one row of `amplitudes`
+        (n_scen, n_factors) per scenario. With horizon_days the amplitudes are in standard
+        deviations of the factor over that many observation steps, otherwise in rate units.
+        """
+        amplitudes = np.atleast_2d(np.asarray(amplitudes, dtype=float))
+        if amplitudes.shape[1] != pca.V.shape[1]:
+            raise ValueError(f"Expected {pca.V.shape[1]} factor amplitudes, got {amplitudes.shape[1]}.")
+        if horizon_days is not None:
+            amplitudes = amplitudes * np.sqrt(pca.s * horizon_days)
+        return cls(
+            names=[f"pca_{i}" for i in range(len(amplitudes))],
+            fwd_shift=amplitudes @ pca.V.T,
+            fwd_tenors_m=np.asarray(pca.tenors, dtype=int),
+        )
+
+    @classmethod
+    def vol(cls, scales: np.ndarray) -> "ScenarioSet":
+        """Vol scalings: (n_scen,) for all factors alike or (n_scen, n_factors)."""
+        scales = np.asarray(scales, dtype=float)
+        names = [f"vol_x{s:g}" if scales.ndim == 1 else f"vol_{i}" for i, s in enumerate(scales)]
+        return cls(names=names, vol_scale=scales)
+
+    @classmethod
+    def concat(cls, sets: Sequence["ScenarioSet"]) -> "ScenarioSet":
+        """Stack scenario sets; shocks a set doesn't carry are zero (or unit vol scale)."""
+        if len(sets) == 0:
+            raise ValueError("sets cannot be empty.")
+        fwd_grids = {tuple(s.fwd_tenors_m) for s in sets if s.fwd_tenors_m is not None}
+        if len(fwd_grids) > 1:
+            raise ValueError("Forward shifts must share one fwd_tenors_m grid.")
+
+        def stack(attr, fill):
+            blocks = [getattr(s, attr) for s in sets]
+            if all(b is None for b in blocks):
+                return None
+            width = max(b.shape[1] for b in blocks if b is not None)
+            return np.vstack([
+                np.full((len(s), width), fill) if b is None else np.broadcast_to(b, (len(s), width))
+                for s, b in zip(sets, blocks)
+            ])
+
+        return cls(
+            names=[name for s in sets for name in s.names],
+            par_shift=stack("par_shift", 0.0),
+            fwd_shift=stack("fwd_shift", 0.0),
+            fwd_tenors_m=np.array(fwd_grids.pop()) if fwd_grids else None,
+            vol_scale=stack("vol_scale", 1.0),
+        )
+
+    def subset(self, idx: slice) -> "ScenarioSet":
+        def take(x):
+            return None if x is None else x[idx]
+        return ScenarioSet(
+            names=self.names[idx], par_shift=take(self.par_shift), fwd_shift=take(self.fwd_shift),
+            fwd_tenors_m=self.fwd_tenors_m, vol_scale=take(self.vol_scale),
+        )
+
+
+class ScenarioCurves:
+    """
+    n_scen discount curves on shared knots: ln P_s(t) = Σ_k B_k(t) ln P_{s,k} with B the
+    natural-spline basis (the `DiscountCurve` convention). Array methods return
+    (n_scen, len(t)), so the closed-form engines accept it as discount and forward curve.
+    """
+
+    def __init__(self, knot_yr: np.ndarray, log_knot_dfs: np.ndarray, basis: Optional[CubicSpline] = None):
+        self.knot_yr = np.asarray(knot_yr, dtype=float)
+        self.log_knot_dfs = np.atleast_2d(np.asarray(log_knot_dfs, dtype=float))
+        if self.log_knot_dfs.shape[1] != len(self.knot_yr):
+            raise ValueError("log_knot_dfs must have one column per knot.")
+        self._basis = basis or CubicSpline(self.knot_yr, np.eye(len(self.knot_yr)), bc_type="natural")
+
+    def __len__(self) -> int:
+        return len(self.log_knot_dfs)
+
+    def subset(self, idx: slice) -> "ScenarioCurves":
+        return ScenarioCurves(self.knot_yr, self.log_knot_dfs[idx], self._basis)
+
+    def dfs(self, t_yr: np.ndarray) -> np.ndarray:
+        return np.exp(self.log_knot_dfs @ self._basis(np.asarray(t_yr, dtype=float)).T)
+
+    def forwards(self, t_start_yr: np.ndarray, t_end_yr: np.ndarray) -> np.ndarray:
+        t_start_yr = np.asarray(t_start_yr, dtype=float)
+        t_end_yr = np.asarray(t_end_yr, dtype=float)
+        if np.any(t_end_yr <= t_start_yr):
+            raise ValueError("every t_end must be > its t_start.")
+        return (self.dfs(t_start_yr) / self.dfs(t_end_yr) - 1.0) / (t_end_yr - t_start_yr)
+
+
+class ScenarioEngine:
+    def __init__(self, par_tenors_m: np.ndarray, par_yields: np.ndarray):
+        """
+        par_tenors_m: (n_par,)  quoted tenors in months
+        par_yields:   (n_par,)  one date's par yields (decimal) — the base scenario
+        """
+        self.par_tenors_m = np.asarray(par_tenors_m, dtype=int)
+        self.par_yields = np.asarray(par_yields, dtype=float)
+        if self.par_yields.shape != self.par_tenors_m.shape:
+            raise ValueError(f"par_yields shape {self.par_yields.shape} doesn't match tenors.")
+        self.base_dfs = bootstrap_par_yields(self.par_tenors_m, self.par_yields)
+        knot_yr = self.par_tenors_m.astype(float) / 12.0
+        # Anchor df(0) ≡ 1, as DiscountCurve does.
+        self.knot_yr = np.concatenate([[0.0], knot_yr]) if knot_yr[0] > 0 else knot_yr
+        self._basis = CubicSpline(self.knot_yr, np.eye(len(self.knot_yr)), bc_type="natural")
+
+    # ------------------------------------------------------------------ shocked inputs
+
+    def shocked_par_dfs(self, scenarios: ScenarioSet) -> np.ndarray:
+        """(n_scen, n_par) bootstrapped DFs of the shifted par curves (forward shifts excluded)."""
+        if scenarios.par_shift is None:
+            return np.broadcast_to(self.base_dfs, (len(scenarios), len(self.base_dfs)))
+        if scenarios.par_shift.shape[1] not in (1, len(self.par_tenors_m)):
+            raise ValueError(
+                f"par_shift has {scenarios.par_shift.shape[1]} columns; expected 1 or {len(self.par_tenors_m)}."
+            )
+        return bootstrap_par_yields(self.par_tenors_m, self.par_yields + scenarios.par_shift)
+
+    def curves(self, scenarios: ScenarioSet) -> ScenarioCurves:
+        log_dfs = np.log(self.shocked_par_dfs(scenarios))
+        if scenarios.fwd_shift is not None:
+            S = _PiecewiseLinearIntegral(scenarios.fwd_tenors_m / 12.0, scenarios.fwd_shift.T)
+            log_dfs = log_dfs - S(self.par_tenors_m / 12.0).T
+        if len(self.knot_yr) > len(self.par_tenors_m):
+            log_dfs = np.hstack([np.zeros((len(log_dfs), 1)), log_dfs])
+        return ScenarioCurves(self.knot_yr, log_dfs, self._basis)
+
+    def f0_shifts(self, scenarios: ScenarioSet, tenors_m: np.ndarray) -> np.ndarray:
+        """
+        (n_scen, n_tenors) instantaneous-forward shifts on an HJM tenor grid: the change in
+        the `build_forward_curve` forwards from the par shift, plus fwd_shift interpolated
+        linearly (flat outside its grid).
+        """
+        tenors_m = np.asarray(tenors_m, dtype=int)
+        out = np.zeros((len(scenarios), len(tenors_m)))
+        if scenarios.par_shift is not None:
+            base = instantaneous_forwards_from_dfs(self.par_tenors_m, self.base_dfs, tenors_m)
+            out += instantaneous_forwards_from_dfs(self.par_tenors_m, self.shocked_par_dfs(scenarios), tenors_m) - base
+        if scenarios.fwd_shift is not None:
+            W = np.stack([_interp_weights(x, scenarios.fwd_tenors_m) for x in tenors_m])
+            out += scenarios.fwd_shift @ W.T
+        return out
+
+    # ------------------------------------------------------------------ repricing
+
+    @instrumented(unit="scenarios", count=lambda res, self, insts, scenarios, *a, **k: len(scenarios))
+    def price_closed_form(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            scenarios: ScenarioSet,
+            vol_cube,
+            model: str = "lognormal",
+            curves: Optional[ScenarioCurves] = None,
+    ) -> np.ndarray:
+        """
+        PVs under every scenario, shape (n_scen, n_trades), with the Black ('lognormal')
+        or Bachelier ('normal') engine on the shocked curves. Vols are looked up once per
+        caplet (sticky strike) and scaled by a single-column `vol_scale`. `curves` are
+        this set's `self.curves(scenarios)`, when already built (e.g. shared by books).
+        """
+        from pricers.capfloor_bachelier import CapFloorBachelierEngine
+        from pricers.capfloor_black import CapFloorBlackEngine
+
+        engines = {"lognormal": CapFloorBlackEngine, "normal": CapFloorBachelierEngine}
+        if model not in engines:
+            raise ValueError(f"Unknown model '{model}'. Supported: {list(engines)}.")
+        if scenarios.vol_scale is not None and scenarios.vol_scale.shape[1] != 1:
+            raise ValueError("Closed-form repricing takes one vol scale per scenario.")
+
+        b = as_book(insts)
+        if curves is not None and len(curves) != len(scenarios):
+            raise ValueError(f"{len(curves)} curves for {len(scenarios)} scenarios.")
+        base_vols = _FixedVols(bulk_vols(vol_cube, b.fixing_time, b.accrual, b.per_caplet(b.strike), model))
+        out = np.empty((len(scenarios), len(b)))
+        for idx in _chunks(len(scenarios), b.n_caplets):
+            chunk = scenarios.subset(idx)
+            chunk_curves = self.curves(chunk) if curves is None else curves.subset(idx)
+            vols = base_vols if chunk.vol_scale is None else _FixedVols(base_vols.vols * chunk.vol_scale)
+            out[idx] = engines[model](chunk_curves, chunk_curves, vols).price_book(b)
+        return out
+
+    def price_gaussian_hjm(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            scenarios: ScenarioSet,
+            engine,
+    ) -> np.ndarray:
+        """(n_scen, n_trades) PVs from a `CapFloorGaussianHJMEngine` under f0 shifts and vol scales."""
+        b = as_book(insts)
+        f0_shifts = self.f0_shifts(scenarios, engine.tenors_m)
+        out = np.empty((len(scenarios), len(b)))
+        for idx in _chunks(len(scenarios), b.n_caplets):
+            vol_scale = None if scenarios.vol_scale is None else scenarios.vol_scale[idx]
+            out[idx] = engine.price_scenarios(b, f0_shifts=f0_shifts[idx], vol_scale=vol_scale)
+        return out
+
+    def price_mc(
+            self,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            scenarios: ScenarioSet,
+            simulator,
+            n_paths: int = 5000,
+            steps_per_year: int = 12,
+            seed: Optional[int] = None,
+    ) -> dict:
+        """
+        Monte Carlo PVs per scenario with common random numbers: every scenario is simulated
+        from a copy of `simulator` with shocked f0 / loadings and the same seed.
+
+        Returns {'pv', 'se'}, each (n_scen, n_trades).
+        """
+        from pricers.capfloor_mc import CapFloorMCEngine
+        from simulation.hjm_forward import HJMForwardSimulator
+
+        b = as_book(insts)
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2 ** 63)
+        f0_shifts = self.f0_shifts(scenarios, simulator.tenors_m)
+        vol_scale = np.ones((len(scenarios), 1)) if scenarios.vol_scale is None else scenarios.vol_scale
+
+        pv, se = np.empty((len(scenarios), len(b))), np.empty((len(scenarios), len(b)))
+        for i in range(len(scenarios)):
+            sim = HJMForwardSimulator(
+                f0=simulator.f0 + f0_shifts[i], tenors_m=simulator.tenors_m,
+                vol_loadings=simulator.vol_loadings * vol_scale[i], seed=seed,
+                background_noise=simulator.background_noise, kernel=simulator.kernel,
+                advection=simulator.advection,
+            )
+            res = CapFloorMCEngine(sim).price_many(b, n_paths=n_paths, steps_per_year=steps_per_year)
+            pv[i], se[i] = res["pv"], res["se"]
+        return {"pv": pv, "se": se}
+
+
+class _FixedVols:
+    """Per-caplet vols already looked up for a book, (n_caplets,) or (n_scen, n_caplets)."""
+
+    def __init__(self, vols: np.ndarray):
+        self.vols = np.asarray(vols, dtype=float)
+
+    def capfloor_vols(self, T, accrual, strike, model: str) -> np.ndarray:
+        return self.vols
+
+
+def _chunks(n_scen: int, n_caplets: int):
+    step = max(1, SCENARIO_CHUNK_ELEMENTS // max(n_caplets, 1))
+    for lo in range(0, n_scen, step):
+        yield slice(lo, min(lo + step, n_scen))
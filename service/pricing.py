@@ -0,0 +1,505 @@
+"""
+Long-running local pricing service with request micro-batching.
+
+    python -m service.pricing --source synthetic --port 8765
+    curl -s localhost:8765/price -d '{"engine": "gaussian_hjm", "trades": [...]}'
+    curl -s localhost:8765/metrics
+
+Curves, the vol surface and the simulator are built once at start-up (`build_engines`)
+and stay warm. Requests go onto a queue; `MicroBatcher` waits up to `window_ms` after the
+first arrival (or until `max_batch_trades` trades are queued), stacks every request for
+the same engine into one `CapFloorBook` and prices it in a single call — one bulk
+closed-form pass or one shared Monte Carlo path set — then slices the per-trade results
+back to each caller. Pricing runs on one worker thread, so the event loop keeps taking
+requests while a batch is in flight (they form the next batch) and engines never see
+concurrent calls. If a batch fails, its requests are retried one by one so a single bad
+trade only fails its own caller.
+
+`PricingServer` speaks minimal HTTP/1.1 with JSON bodies over TCP or a Unix socket:
+
+    POST /price    {"engine": name, "trades": [trade, ...]}  →  {"pv": [...], ...}
+    GET  /metrics  queue depth, batch sizes, queue-wait / compute / end-to-end latency
+    GET  /health   {"status": "ok", "engines": [...]}
+
+A trade is {"strike", "notional", "payoff_type", "schedule": [cashflow, ...]} plus the
+optional `CapFloor` fields; a cashflow is {"pay_date", "fixing_time", "accrual", "start",
+"end"} or the same five numbers as a list.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date as dt
+from typing import Callable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from data.term_data import TermStructureData
+from instruments.book import CAPLET_COLUMNS, CapFloorBook, as_book
+from instruments.capsfloors import CapFloor, CashFlow
+from utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# An engine entry maps a book to per-trade result arrays, e.g. {"pv": (n_trades,)}.
+BookPricer = Callable[[CapFloorBook], dict]
+
+PERCENTILES = (50, 95, 99)
+MAX_BODY_BYTES = 64 * 2 ** 20
+
+
+def closed_form(engine) -> BookPricer:
+    """Adapter for engines with `price_book(book) -> (n_trades,)`."""
+    def run(book: CapFloorBook) -> dict:
+        return {"pv": np.asarray(engine.price_book(book), dtype=float)}
+    return run
+
+
+def monte_carlo(engine, n_paths: int = 5000, steps_per_year: int = 12) -> BookPricer:
+    """Adapter for `CapFloorMCEngine`: the whole batch shares one path set."""
+    def run(book: CapFloorBook) -> dict:
+        res = engine.price_many(book, n_paths=n_paths, steps_per_year=steps_per_year)
+        return {"pv": res["pv"], "se": res["se"]}
+    return run
+
+
+# ====================================================================================================
+#                                              Batching
+# ====================================================================================================
+class ServiceMetrics:
+    """Counters plus rolling windows of the last `window` latency / batch-size samples."""
+
+    def __init__(self, window: int = 10_000):
+        self.requests = 0
+        self.trades = 0
+        self.batches = 0
+        self.errors = 0
+        self.queue_wait_s = deque(maxlen=window)
+        self.compute_s = deque(maxlen=window)
+        self.latency_s = deque(maxlen=window)
+        self.batch_requests = deque(maxlen=window)
+        self.batch_trades = deque(maxlen=window)
+
+    @staticmethod
+    def _summary(samples: deque) -> dict:
+        if not samples:
+            return {"n": 0}
+        x = np.fromiter(samples, dtype=float)
+        out = {"n": len(x), "mean": float(x.mean()), "max": float(x.max())}
+        out.update({f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(x, PERCENTILES))})
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "trades": self.trades,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queue_wait_s": self._summary(self.queue_wait_s),
+            "compute_s": self._summary(self.compute_s),
+            "latency_s": self._summary(self.latency_s),
+            "batch_requests": self._summary(self.batch_requests),
+            "batch_trades": self._summary(self.batch_trades),
+        }
+
+
+@dataclass
+class _Job:
+    engine: str
+    book: CapFloorBook
+    future: asyncio.Future
+    enqueued: float
+
+
+class ServiceUnavailable(RuntimeError):
+    """The batcher is stopped or was never started; mapped to HTTP 503."""
+
+
+class MicroBatcher:
+    def __init__(
+            self,
+            engines: Mapping[str, BookPricer],
+            window_ms: float = 2.0,
+            max_batch_trades: int = 50_000,
+            metrics_window: int = 10_000,
+    ):
+        """
+        engines:          name → book pricer (see `closed_form`, `monte_carlo`)
+        window_ms:        how long the first request of a batch waits for company
+        max_batch_trades: close the batch early once this many trades are queued
+        """
+        if not engines:
+            raise ValueError("engines cannot be empty.")
+        if window_ms < 0 or max_batch_trades < 1:
+            raise ValueError("Need window_ms >= 0 and max_batch_trades >= 1.")
+        self.engines = dict(engines)
+        self.window_s = window_ms / 1e3
+        self.max_batch_trades = max_batch_trades
+        self.metrics = ServiceMetrics(metrics_window)
+        self.in_flight = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: list[_Job] = []      # taken off the queue, not yet answered
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            raise RuntimeError("MicroBatcher is already running.")
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pricing")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop batching; requests queued or in flight fail with ServiceUnavailable."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        jobs = self._pending
+        while not self._queue.empty():
+            jobs.append(self._queue.get_nowait())
+        for job in jobs:
+            if not job.future.done():
+                job.future.set_exception(ServiceUnavailable("Pricing service stopped."))
+        self._pending = []
+        self.in_flight = 0
+        self._executor.shutdown(wait=True)
+        self._task = self._executor = None
+
+    async def __aenter__(self) -> "MicroBatcher":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def price(self, engine: str, insts: Union[CapFloorBook, Sequence[CapFloor]]) -> dict:
+        """Queue one request and wait for its slice of the batch result."""
+        if self._task is None:
+            raise ServiceUnavailable("MicroBatcher is not running; call start() first.")
+        if engine not in self.engines:
+            raise ValueError(f"Unknown engine '{engine}'. Supported: {list(self.engines)}.")
+        job = _Job(engine, as_book(insts), asyncio.get_running_loop().create_future(), time.perf_counter())
+        self._queue.put_nowait(job)
+        return await job.future
+
+    def metrics_dict(self) -> dict:
+        return {"queue_depth": self.queue_depth, "in_flight": self.in_flight, **self.metrics.to_dict()}
+
+    # ------------------------------------------------------------------ internals
+
+    async def _collect(self) -> list[_Job]:
+        # Collected jobs live on self so stop() can still answer them if it cancels us.
+        jobs = self._pending = [await self._queue.get()]
+        n_trades = len(jobs[0].book)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window_s
+        while n_trades < self.max_batch_trades:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                job = self._queue.get_nowait()
+            jobs.append(job)
+            n_trades += len(job.book)
+        return jobs
+
+    async def _run(self) -> None:
+        while True:
+            jobs = await self._collect()
+            self.in_flight = len(jobs)
+            groups: dict[str, list[_Job]] = {}
+            for job in jobs:
+                groups.setdefault(job.engine, []).append(job)
+            for name, group in groups.items():
+                await self._price_group(name, group)
+            self._pending = []
+            self.in_flight = 0
+
+    async def _price_group(self, name: str, group: list[_Job]) -> None:
+        loop = asyncio.get_running_loop()
+        pricer = self.engines[name]
+        started = time.perf_counter()
+        try:
+            book = CapFloorBook.concat([job.book for job in group])
+            result = await loop.run_in_executor(self._executor, pricer, book)
+        except Exception as exc:
+            if len(group) > 1:
+                logger.warning("Batch of %d '%s' requests failed (%s); retrying individually.", len(group), name, exc)
+                for job in group:
+                    await self._price_group(name, [job])
+                return
+            self.metrics.errors += 1
+            if not group[0].future.done():
+                group[0].future.set_exception(exc)
+            return
+        done = time.perf_counter()
+
+        m = self.metrics
+        m.batches += 1
+        m.compute_s.append(done - started)
+        m.batch_requests.append(len(group))
+        m.batch_trades.append(len(book))
+        lo = 0
+        for job in group:
+            hi = lo + len(job.book)
+            m.requests += 1
+            m.trades += len(job.book)
+            m.queue_wait_s.append(started - job.enqueued)
+            m.latency_s.append(done - job.enqueued)
+            if not job.future.done():
+                job.future.set_result({key: np.asarray(val)[lo:hi] for key, val in result.items()})
+            lo = hi
+
+
+# ====================================================================================================
+#                                           HTTP front end
+# ====================================================================================================
+def trades_from_json(trades: Sequence[dict]) -> CapFloorBook:
+    if not isinstance(trades, list) or not trades:
+        raise ValueError("'trades' must be a non-empty list.")
+    insts = []
+    for t in trades:
+        schedule = [
+            CashFlow(**{c: float(cf[c]) for c in CAPLET_COLUMNS}) if isinstance(cf, dict)
+            else CashFlow(*map(float, cf))
+            for cf in t["schedule"]
+        ]
+        insts.append(CapFloor(
+            strike=float(t["strike"]),
+            notional=float(t["notional"]),
+            schedule=schedule,
+            payoff_type=t.get("payoff_type", "cap"),
+            index_name=t.get("index_name"),
+            pay_conv=t.get("pay_conv", "ACT/360"),
+            model_hint=t.get("model_hint", "auto"),
+        ))
+    return CapFloorBook.from_capfloors(insts)
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class PricingServer:
+    def __init__(
+            self,
+            batcher: MicroBatcher,
+            host: str = "127.0.0.1",
+            port: int = 8765,
+            unix_path: Optional[str] = None,
+    ):
+        """Serves on host:port, or on the Unix socket `unix_path` when given."""
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        if self.unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]   # resolves port=0
+        logger.info("Pricing service listening on %s", self.unix_path or f"http://{self.host}:{self.port}")
+        return self._server
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method, path.split("?", 1)[0], body)
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        if path == "/health":
+            return 200, {"status": "ok", "engines": list(self.batcher.engines)}
+        if path == "/metrics":
+            return 200, self.batcher.metrics_dict()
+        if path != "/price":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST /price"}
+
+        start = time.perf_counter()
+        try:
+            request = json.loads(body)
+            book = trades_from_json(request["trades"])
+            result = await self.batcher.price(request["engine"], book)
+        except (KeyError, TypeError, ValueError) as exc:
+            return 400, {"error": f"{type(exc).__name__}: {exc}"}
+        except ServiceUnavailable as exc:
+            return 503, {"error": str(exc)}
+        except Exception as exc:
+            logger.exception("Pricing request failed")
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+        return 200, {
+            **{key: val.tolist() for key, val in result.items()},
+            "latency_ms": (time.perf_counter() - start) * 1e3,
+        }
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, close: bool) -> None:
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+# ====================================================================================================
+#                                            Warm state
+# ====================================================================================================
+def build_engines(
+        par_yields: TermStructureData,
+        degrees: Sequence[int] = (1, 2, 3),
+        window_months: int = 3,
+        max_tenor_m: int = 120,
+        vol_cube=None,
+        n_paths: int = 5000,
+        steps_per_year: int = 12,
+        seed: Optional[int] = None,
+) -> dict[str, BookPricer]:
+    """
+    Run the pipeline once and return warm book pricers keyed by engine name.
+
+    Always provides 'gaussian_hjm' and 'mc' (HJM calibrated to the last date's local
+    vol); with a `vol_cube` (e.g. `CapFloorVolCube`) also 'black', 'bachelier' and 'book'
+    on the bootstrapped discount curve of the last date.
+    """
+    from pricers.capfloor_gaussian_hjm import CapFloorGaussianHJMEngine
+    from pricers.capfloor_mc import CapFloorMCEngine
+    from rates.forward_curve import build_forward_curve
+    from simulation.hjm_forward import HJMForwardSimulator
+    from simulation.volSurface import VolatilitySurface
+
+    fwd = build_forward_curve(par_yields, target_tenors_m=np.arange(1, max_tenor_m + 1)).to_dataframe()
+    vs = VolatilitySurface(forward_curves=fwd, localVol_window_months=window_months, n_factors=len(degrees))
+    vs.build()
+    sim = HJMForwardSimulator.from_volatility_surface(vs, list(degrees), seed=seed)
+    engines = {
+        "gaussian_hjm": closed_form(CapFloorGaussianHJMEngine.from_simulator(sim)),
+        "mc": monte_carlo(CapFloorMCEngine(sim), n_paths=n_paths, steps_per_year=steps_per_year),
+    }
+
+    if vol_cube is not None:
+        from pricers.capfloor_bachelier import CapFloorBachelierEngine
+        from pricers.capfloor_black import CapFloorBlackEngine
+        from pricers.capfloor_book import CapFloorBookEngine
+        from rates.discount_curve import DiscountCurve
+
+        curve = DiscountCurve.from_par_yields(par_yields.tenors, par_yields.values[-1])
+        engines.update(
+            black=closed_form(CapFloorBlackEngine(curve, curve, vol_cube)),
+            bachelier=closed_form(CapFloorBachelierEngine(curve, curve, vol_cube)),
+            book=closed_form(CapFloorBookEngine(curve, curve, vol_cube)),
+        )
+    return engines
+
+
+async def serve(engines: Mapping[str, BookPricer], host: str = "127.0.0.1", port: int = 8765,
+                unix_path: Optional[str] = None, **batcher_kwargs) -> None:
+    async with MicroBatcher(engines, **batcher_kwargs) as batcher:
+        await PricingServer(batcher, host, port, unix_path).serve_forever()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["fred", "synthetic"], default="fred")
+    parser.add_argument("--sdate", type=dt.fromisoformat, default=None)
+    parser.add_argument("--edate", type=dt.fromisoformat, default=None)
+    parser.add_argument("--degrees", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--window-months", type=int, default=3)
+    parser.add_argument("--vol-quotes", default=None, help="CSV for CapFloorVolCube.from_quotes")
+    parser.add_argument("--n-paths", type=int, default=5000)
+    parser.add_argument("--steps-per-year", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch-trades", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    edate = args.edate or dt.today()
+    sdate = args.sdate or dt(edate.year - 1, edate.month, 1)
+    if args.source == "synthetic":
+        from data.synthetic import SyntheticTSDLoader
+        loader = SyntheticTSDLoader(seed=args.seed)
+    else:
+        from data.registry import DEFAULT_TERM_STRUCTURE_LOADER as loader
+
+    cube = None
+    if args.vol_quotes is not None:
+        import pandas as pd
+        from volatility.capfloor_cube import CapFloorVolCube
+        cube = CapFloorVolCube.from_quotes(pd.read_csv(args.vol_quotes))
+
+    start = time.perf_counter()
+    engines = build_engines(
+        loader.load(sdate, edate), degrees=args.degrees, window_months=args.window_months,
+        vol_cube=cube, n_paths=args.n_paths, steps_per_year=args.steps_per_year, seed=args.seed,
+    )
+    logger.info("Warm state built in %.2fs; engines: %s", time.perf_counter() - start, ", ".join(engines))
+    try:
+        asyncio.run(serve(
+            engines, args.host, args.port, args.unix,
+            window_ms=args.window_ms, max_batch_trades=args.max_batch_trades,
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,29 @@ import typing
 import numpy as np
 
 from simulation.drift import get_HJM_drifts as get_drift
+from simulation.noise import NoiseProducer
 from simulation.volSurface import VolatilitySurface
+from utils.instrumentation import instrumented
+
+if typing.TYPE_CHECKING:
+    from simulation.path_store import PathStore
 
 
 class MCSimulation:
-    def __init__(self, VS: VolatilitySurface, seed: typing.Optional[int] = None):
+    def __init__(
+            self,
+            VS: VolatilitySurface,
+            seed: typing.Optional[int] = None,
+            background_noise: bool = False,
+    ):
+        """
+        background_noise: generate dW path-block by path-block on a worker thread
+        (`NoiseProducer`) while earlier blocks are integrated. Output is identical to
+        the single-tensor draw for the same seed.
+        """
+        self.seed = seed
         self.rng = np.random.default_rng(seed)
+        self.background_noise = background_noise
         self.VS = VS
         self.timeline = VS.timeline
         self.tenors = VS.tenors
@@ -35,11 +52,10 @@ class MCSimulation:
         denom = np.array([self.VS.bdays_dict[t.year] for t in self.VS.timeline[1:]], dtype=float)
         return bdays / denom
 
-    def sim(self, degrees: list[int], paths: int = 1):
+    def _setup(self, degrees: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Per-step drift increments (1, n_steps, n_tenors) and vols (n_steps, n_tenors, n_factors)."""
         self.dt = self._year_fractions()
         self.sqrt_dt = np.sqrt(self.dt)
-        n_steps = len(self.dt)
-        n_tenors = len(self.tenors)
 
         # Compute polyfits once; share with drift to avoid duplicate work.
         vol_surface = self.VS.polyfit(self.timeline, degrees=degrees)
@@ -48,19 +64,81 @@ class MCSimulation:
             np.asarray(vol_surface[t]).T for t in self.timeline[1:]
         ])  # (n_steps, n_tenors, n_factors)
 
-        dW = self.rng.normal(scale=1.0, size=(paths, n_steps, self.n_factors))
-
         drift_term = simulate_drifts[np.newaxis, :, :] * self.dt[np.newaxis, :, np.newaxis]
+        return drift_term, vol_tensor
+
+    def _cumulative_increments(self, dW: np.ndarray, drift_term: np.ndarray, vol_tensor: np.ndarray) -> np.ndarray:
+        """(block_paths, n_steps, n_tenors) running sums of drift + diffusion for a dW block."""
         vol_dW_term = np.einsum(
             'tnf, ptf -> ptn',
             vol_tensor,
             dW * self.sqrt_dt[np.newaxis, :, np.newaxis],
         )
+        return np.cumsum(drift_term + vol_dW_term, axis=1)
 
-        increments = drift_term + vol_dW_term
+    @instrumented(unit="path_steps", count=lambda res, *a, **k: res[0].shape[0] * (res[0].shape[1] - 1))
+    def sim(self, degrees: list[int], paths: int = 1):
+        drift_term, vol_tensor = self._setup(degrees)
+        n_steps = len(self.dt)
+        n_tenors = len(self.tenors)
         paths_array = np.zeros((paths, n_steps + 1, n_tenors))
-        paths_array[:, 1:, :] = np.cumsum(increments, axis=1)
+
+        # Paths are independent, so dW is consumed in path blocks; drawing the blocks
+        # in order reproduces the (paths, n_steps, n_factors) tensor exactly.
+        for lo, dW in self._path_noise(paths, n_steps):
+            paths_array[lo:lo + len(dW), 1:, :] = self._cumulative_increments(dW, drift_term, vol_tensor)
 
         sim_forward_curve = self.VS.windowed_fwds_df.to_numpy()[np.newaxis, :, :] + paths_array
 
         return paths_array, sim_forward_curve
+
+    @instrumented(unit="path_steps", count=lambda res, *a, **k: res.n_paths * res.n_steps)
+    def sim_to_store(
+            self,
+            directory: str,
+            degrees: list[int],
+            paths: int = 1,
+            forward: bool = True,
+            chunk_paths: typing.Optional[int] = None,
+            chunk_steps: int = 32,
+            dtype=np.float64,
+            overwrite: bool = False,
+    ) -> "PathStore":
+        """
+        `sim`, streamed to a chunked memory-mapped store at `directory`; returns its reader.
+        Stores sim_forward_curve (forward=True) or the cumulative increments paths_array,
+        equal to `sim`'s output for the same seed. Increments are formed chunk_paths at a
+        time, so only the (paths, n_steps, n_factors) normals are ever held in full.
+        """
+        from simulation.path_store import PathStoreWriter
+
+        drift_term, vol_tensor = self._setup(degrees)
+        n_steps = len(self.dt)
+        writer = PathStoreWriter(
+            directory, paths, n_steps, self.tenors, self.dt,
+            chunk_paths=chunk_paths, chunk_steps=chunk_steps, dtype=dtype, seed=self.seed,
+            vol_loadings=vol_tensor, overwrite=overwrite,
+            attrs={"simulator": type(self).__name__, "degrees": list(degrees), "forward": forward,
+                   "start": str(self.timeline[0]), "end": str(self.timeline[-1])},
+        )
+        base = self.VS.windowed_fwds_df.to_numpy()[np.newaxis, :, :] if forward else 0.0
+        cp = writer.chunks[0]
+        for lo, dW in self._path_noise(paths, n_steps):
+            for b in range(0, len(dW), cp):
+                block = np.zeros((min(cp, len(dW) - b), n_steps + 1, len(self.tenors)))
+                block[:, 1:, :] = self._cumulative_increments(dW[b:b + cp], drift_term, vol_tensor)
+                writer.write(block + base, lo + b, 0)
+        return writer.close()
+
+    def _path_noise(self, paths: int, n_steps: int) -> typing.Iterator[tuple[int, np.ndarray]]:
+        """Yield (first path index, dW block of shape (block_paths, n_steps, n_factors))."""
+        if not self.background_noise:
+            yield 0, self.rng.normal(scale=1.0, size=(paths, n_steps, self.n_factors))
+            return
+        row = (n_steps, self.n_factors)
+        block = (NoiseProducer.rows_per_block(row), *row)
+        with NoiseProducer(self.rng, block, n_rows=paths) as producer:
+            lo = 0
+            for dW in producer:
+                yield lo, dW
+                lo += len(dW)
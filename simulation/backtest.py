@@ -0,0 +1,204 @@
+"""
+Rolling-origin backtest of the historical HJM replay (`MCSimulation`).
+
+From each origin date o the forward curve is projected h steps ahead with the same
+replay dynamics as `MCSimulation.sim`,
+
+    f̂(o + h) = f(o) + Σ_{k=o}^{o+h-1} [α_k dt_k + σ_k √dt_k Z_k]
+
+and compared with the observed f(o + h). The fitted-vol tensor σ, the drifts α and the
+year fractions dt are computed once for the whole timeline (`MCSimulation._setup`);
+every window is a slice of those shared arrays, so hundreds of origins cost little
+more than one full replay. Each origin draws its own noise from
+default_rng([seed, origin index]), so results don't depend on n_jobs or origin order.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from simulation.MonteCarlo import MCSimulation
+from simulation.volSurface import VolatilitySurface
+from utils.instrumentation import instrumented
+
+# Worker-process copy of the shared arrays, set once per process by `_init_worker`.
+_SHARED: dict = {}
+
+
+@dataclass
+class BacktestResult:
+    origins: np.ndarray          # (n_origins,) origin dates
+    horizons: np.ndarray         # (n_horizons,) steps ahead
+    tenors: list[int]
+    mean: np.ndarray             # (n_origins, n_horizons, n_tenors) mean simulated curve
+    lower: np.ndarray            # (n_origins, n_horizons, n_tenors) central-interval bounds
+    upper: np.ndarray
+    realized: np.ndarray         # (n_origins, n_horizons, n_tenors) observed curve
+    coverage_level: float
+
+    def __repr__(self):
+        return (f"BacktestResult(n_origins={len(self.origins)}, horizons={self.horizons.tolist()}, "
+                f"coverage_level={self.coverage_level:g})")
+
+    @property
+    def error(self) -> np.ndarray:
+        """Mean forecast − realized, (n_origins, n_horizons, n_tenors)."""
+        return self.mean - self.realized
+
+    @property
+    def hits(self) -> np.ndarray:
+        """Realized curve inside the simulated central interval, (n_origins, n_horizons, n_tenors)."""
+        return (self.realized >= self.lower) & (self.realized <= self.upper)
+
+    def summary(self):
+        """Bias, MAE, RMSE and interval coverage per horizon, pooled over origins and tenors."""
+        import pandas as pd
+
+        err = self.error
+        return pd.DataFrame(
+            {
+                "bias": err.mean(axis=(0, 2)),
+                "mae": np.abs(err).mean(axis=(0, 2)),
+                "rmse": np.sqrt((err ** 2).mean(axis=(0, 2))),
+                "coverage": self.hits.mean(axis=(0, 2)),
+            },
+            index=pd.Index(self.horizons, name="horizon"),
+        )
+
+    def by_tenor(self, stat: str = "rmse"):
+        """(horizon × tenor) table of 'bias', 'mae', 'rmse' or 'coverage', pooled over origins."""
+        import pandas as pd
+
+        err = self.error
+        stats = {
+            "bias": lambda: err.mean(axis=0),
+            "mae": lambda: np.abs(err).mean(axis=0),
+            "rmse": lambda: np.sqrt((err ** 2).mean(axis=0)),
+            "coverage": lambda: self.hits.mean(axis=0),
+        }
+        if stat not in stats:
+            raise ValueError(f"Unknown stat '{stat}'. Supported: {list(stats)}.")
+        return pd.DataFrame(stats[stat](), index=pd.Index(self.horizons, name="horizon"), columns=self.tenors)
+
+
+class RollingBacktest:
+    def __init__(
+            self,
+            VS: VolatilitySurface,
+            degrees: list[int],
+            seed: Optional[int] = None,
+    ):
+        """
+        VS:       built surface whose timeline is replayed
+        degrees:  polynomial degrees of the vol-loading fits, as for `MCSimulation.sim`
+        seed:     base seed; origin i uses default_rng([seed, i])
+        """
+        sim = MCSimulation(VS)
+        drift_term, vol_tensor = sim._setup(degrees)
+        self.VS = VS
+        self.degrees = list(degrees)
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else seed
+        self.dates = list(VS.timeline)
+        self.tenors = list(VS.tenors)
+        self.observed = VS.windowed_fwds_df.to_numpy(dtype=float)    # (n_steps + 1, n_tenors)
+        self.drift_dt = drift_term[0]                                 # (n_steps, n_tenors), α_k dt_k
+        self.vol_tensor = vol_tensor                                  # (n_steps, n_tenors, n_factors)
+        self.sqrt_dt = sim.sqrt_dt                                    # (n_steps,)
+
+    @property
+    def n_steps(self) -> int:
+        return len(self.drift_dt)
+
+    @instrumented("RollingBacktest.run", unit="origins", count=lambda res, *a, **k: len(res.origins))
+    def run(
+            self,
+            horizon: int,
+            n_paths: int = 1000,
+            origins: Optional[Sequence[int]] = None,
+            stride: int = 1,
+            horizons: Optional[Sequence[int]] = None,
+            coverage: float = 0.9,
+            n_jobs: int = 1,
+    ) -> BacktestResult:
+        """
+        horizon:   steps simulated from each origin
+        origins:   timeline indices to start from; default every `stride`-th index with
+                   `horizon` steps of history after it
+        horizons:  steps ahead (1..horizon) to score; default all
+        coverage:  central interval of the simulated distribution to check realized curves against
+        n_jobs:    > 1 splits the origins over that many worker processes
+        """
+        if horizon < 1 or horizon > self.n_steps:
+            raise ValueError(f"horizon must be in [1, {self.n_steps}].")
+        if n_paths < 2 or stride < 1 or not 0.0 < coverage < 1.0:
+            raise ValueError("Need n_paths ≥ 2, stride ≥ 1 and coverage in (0, 1).")
+        origins = np.arange(0, self.n_steps - horizon + 1, stride) if origins is None else np.asarray(origins, dtype=int)
+        if len(origins) == 0 or origins.min() < 0 or origins.max() + horizon > self.n_steps:
+            raise ValueError(f"origins must leave {horizon} steps before the end of the timeline.")
+        horizons = np.arange(1, horizon + 1) if horizons is None else np.asarray(horizons, dtype=int)
+        if horizons.min() < 1 or horizons.max() > horizon:
+            raise ValueError(f"horizons must be in [1, {horizon}].")
+
+        q = ((1.0 - coverage) / 2.0, (1.0 + coverage) / 2.0)
+        task = (horizon, n_paths, horizons, q)
+        state = self._state()
+        if n_jobs <= 1:
+            parts = [_run_origins(origins, task, state)]
+        else:
+            chunks = [c for c in np.array_split(origins, n_jobs) if len(c)]
+            with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker, initargs=(state,)) as pool:
+                parts = list(pool.map(_run_origins, chunks, [task] * len(chunks)))
+
+        mean, lower, upper = (np.concatenate([p[i] for p in parts]) for i in range(3))
+        return BacktestResult(
+            origins=np.asarray(self.dates, dtype=object)[origins],
+            horizons=horizons,
+            tenors=self.tenors,
+            mean=mean,
+            lower=lower,
+            upper=upper,
+            realized=self.observed[origins[:, None] + horizons[None, :]],
+            coverage_level=coverage,
+        )
+
+    def replay(self, origin: int, dW: np.ndarray) -> np.ndarray:
+        """
+        Paths from `origin` for given standard normals dW (n_paths, horizon, n_factors):
+        (n_paths, horizon + 1, n_tenors) with [:, 0] the observed curve at the origin.
+        """
+        return _replay(origin, dW, self._state())
+
+    def _state(self) -> dict:
+        return {
+            "observed": self.observed, "drift_dt": self.drift_dt, "vol_tensor": self.vol_tensor,
+            "sqrt_dt": self.sqrt_dt, "seed": self.seed,
+        }
+
+
+def _replay(origin: int, dW: np.ndarray, state: dict) -> np.ndarray:
+    s = slice(origin, origin + dW.shape[1])
+    vol_dW = np.einsum('tnf, ptf -> ptn', state["vol_tensor"][s], dW * state["sqrt_dt"][s][None, :, None])
+    paths = np.empty((dW.shape[0], dW.shape[1] + 1, state["observed"].shape[1]))
+    paths[:, 0] = state["observed"][origin]
+    np.cumsum(state["drift_dt"][s][None] + vol_dW, axis=1, out=paths[:, 1:])
+    paths[:, 1:] += state["observed"][origin]
+    return paths
+
+
+def _run_origins(origins: np.ndarray, task: tuple, state: Optional[dict] = None) -> tuple:
+    state = _SHARED if state is None else state
+    horizon, n_paths, horizons, q = task
+    n_factors = state["vol_tensor"].shape[2]
+    shape = (len(origins), len(horizons), state["observed"].shape[1])
+    mean, lower, upper = np.empty(shape), np.empty(shape), np.empty(shape)
+    for i, o in enumerate(origins):
+        rng = np.random.default_rng([state["seed"], int(o)])
+        paths = _replay(int(o), rng.normal(size=(n_paths, horizon, n_factors)), state)[:, horizons]
+        mean[i] = paths.mean(axis=0)
+        lower[i], upper[i] = np.quantile(paths, q, axis=0)
+    return mean, lower, upper
+
+
+def _init_worker(state: dict) -> None:
+    _SHARED.update(state)
@@ -5,8 +5,10 @@ import pandas as pd
 from scipy.integrate import cumulative_trapezoid
 
 from simulation.volSurface import VolatilitySurface
+from utils.instrumentation import instrumented
 
 
+@instrumented(unit="dates", count=lambda res, *a, **k: len(res))
 def get_HJM_drifts(
         local_vs: VolatilitySurface,
         degrees: list[int],
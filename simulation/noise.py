@@ -0,0 +1,100 @@
+"""
+Background generation of standard-normal blocks for the simulators.
+
+A worker thread fills a small ring of preallocated buffers with
+`Generator.standard_normal(out=...)`, which releases the GIL for the bulk fill, while
+the consuming thread works on the previously delivered block. Blocks are produced
+strictly in order from a single generator, so the concatenated stream is identical to
+drawing the whole tensor serially with `rng.normal(size=...)` — paths stay
+reproducible for a given seed whether or not the producer is used.
+
+    with NoiseProducer(rng, block_shape=(8, n_paths, n_factors), n_rows=n_steps) as noise:
+        for block in noise:        # block: (≤ 8, n_paths, n_factors) view into the ring
+            ...                    # valid until the next block is requested
+"""
+import queue
+import threading
+from typing import Iterator, Optional
+
+import numpy as np
+
+# Target numbers per block; large enough to amortize queue hand-offs, small enough
+# that a few buffers stay cache/memory friendly.
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+class NoiseProducer:
+    def __init__(
+            self,
+            rng: np.random.Generator,
+            block_shape: tuple[int, ...],
+            n_rows: int,
+            n_buffers: int = 2,
+    ):
+        """
+        rng:          generator to draw from; must not be used elsewhere while producing
+        block_shape:  (rows_per_block, *row_shape) of each delivered block
+        n_rows:       total rows to deliver along axis 0; the last block may be short
+        n_buffers:    ring size (2 = double buffering)
+        """
+        if n_rows <= 0 or block_shape[0] <= 0:
+            raise ValueError("n_rows and rows per block must be positive.")
+        if n_buffers < 2:
+            raise ValueError("n_buffers must be at least 2 for the producer to run ahead.")
+
+        self.rng = rng
+        self.block_shape = tuple(block_shape)
+        self.n_rows = n_rows
+        self._buffers = [np.empty(self.block_shape) for _ in range(n_buffers)]
+        self._free: queue.Queue = queue.Queue()
+        self._filled: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def rows_per_block(cls, row_shape: tuple[int, ...], target: int = DEFAULT_BLOCK_SIZE) -> int:
+        """Rows per block so that a block holds roughly `target` numbers."""
+        return max(1, target // max(1, int(np.prod(row_shape))))
+
+    def __enter__(self) -> "NoiseProducer":
+        for i in range(len(self._buffers)):
+            self._free.put(i)
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._free.put(None)  # unblock a producer waiting for a free buffer
+        self._thread.join()
+
+    def _produce(self) -> None:
+        rows = self.block_shape[0]
+        try:
+            for lo in range(0, self.n_rows, rows):
+                idx = self._free.get()
+                if idx is None or self._stop.is_set():
+                    return
+                n = min(rows, self.n_rows - lo)
+                self.rng.standard_normal(out=self._buffers[idx][:n])
+                self._filled.put((idx, n))
+        except BaseException as err:  # surfaced to the consumer
+            self._error = err
+            self._filled.put(None)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self._thread is None:
+            raise RuntimeError("NoiseProducer must be used as a context manager.")
+        rows = self.block_shape[0]
+        prev = None
+        for _ in range(0, self.n_rows, rows):
+            if prev is not None:
+                self._free.put(prev)  # consumer is done with the previous block
+            item = self._filled.get()
+            if item is None:
+                raise RuntimeError("noise producer failed") from self._error
+            prev, n = item
+            yield self._buffers[prev][:n]
+        if prev is not None:
+            self._free.put(prev)
@@ -0,0 +1,316 @@
+"""
+Chunked, memory-mapped on-disk store for simulated forward-curve paths.
+
+A store is a directory holding the (n_paths, n_steps + 1, n_tenors) path tensor as a grid
+of tiles, each its own `.npy` file, chunked by path and by time step:
+
+    store/
+        meta.json              shape, chunks, dtype, tenors_m, dt, seed, loadings hash, ...
+        p00000_s00000.npy      paths [0, cp) × steps [0, cs) × all tenors
+        p00000_s00001.npy      paths [0, cp) × steps [cs, 2cs)
+        ...
+
+`PathStoreWriter` accepts blocks at any (path, step) offset and writes them into the
+tiles they overlap through `np.lib.format.open_memmap`, so a simulator can stream its
+output while holding only a block in memory (`HJMForwardSimulator.simulate_to_store`,
+`MCSimulation.sim_to_store`). `PathStore` memory-maps tiles lazily and assembles only the
+tiles a slice touches: "all paths at step t" reads one tile column, "path block p" one
+tile row, and any (paths, steps, tenors) slice works through indexing.
+"""
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+FORMAT = "hjm-path-store"
+VERSION = 1
+META_FILE = "meta.json"
+TILE_BYTES = 32 * 2 ** 20       # default tile size target
+DEFAULT_CHUNK_STEPS = 32
+
+
+def array_hash(a: np.ndarray) -> str:
+    """Short content hash, e.g. of the vol loadings a path set was simulated with."""
+    return hashlib.sha1(np.ascontiguousarray(a, dtype=float).tobytes()).hexdigest()[:16]
+
+
+def _tile_name(i: int, j: int) -> str:
+    return f"p{i:05d}_s{j:05d}.npy"
+
+
+def _as_range(key, n: int) -> tuple[range, bool]:
+    """Normalize an int or step-1 slice over an axis of length n; flag True if it was an int."""
+    if isinstance(key, (int, np.integer)):
+        k = int(key) + n if key < 0 else int(key)
+        if not 0 <= k < n:
+            raise IndexError(f"index {key} out of range for axis of length {n}.")
+        return range(k, k + 1), True
+    if isinstance(key, slice):
+        r = range(n)[key]
+        if r.step != 1:
+            raise IndexError("Only contiguous slices are supported on the path and step axes.")
+        return r, False
+    raise IndexError(f"Unsupported index {key!r} on the path/step axes; use an int or a slice.")
+
+
+class _Layout:
+    """Shape/chunk bookkeeping shared by writer and reader."""
+
+    def __init__(self, directory: str, shape: Sequence[int], chunks: Sequence[int]):
+        self.directory = directory
+        self.shape = tuple(int(s) for s in shape)
+        self.chunks = tuple(int(c) for c in chunks)
+        self.grid = tuple(-(-s // c) for s, c in zip(self.shape[:2], self.chunks))
+
+    @property
+    def n_paths(self) -> int:
+        return self.shape[0]
+
+    @property
+    def n_steps(self) -> int:
+        return self.shape[1] - 1
+
+    @property
+    def n_tenors(self) -> int:
+        return self.shape[2]
+
+    def tile_shape(self, i: int, j: int) -> tuple[int, int, int]:
+        cp, cs = self.chunks
+        return (min(cp, self.shape[0] - i * cp), min(cs, self.shape[1] - j * cs), self.shape[2])
+
+    def tile_path(self, i: int, j: int) -> str:
+        return os.path.join(self.directory, _tile_name(i, j))
+
+    def overlaps(self, paths: range, steps: range) -> Iterator[tuple]:
+        """(i, j, tile-local slices, block-local slices) for every tile the block overlaps."""
+        cp, cs = self.chunks
+        if len(paths) == 0 or len(steps) == 0:
+            return
+        for i in range(paths.start // cp, (paths.stop - 1) // cp + 1):
+            p_lo, p_hi = max(paths.start, i * cp), min(paths.stop, (i + 1) * cp)
+            for j in range(steps.start // cs, (steps.stop - 1) // cs + 1):
+                s_lo, s_hi = max(steps.start, j * cs), min(steps.stop, (j + 1) * cs)
+                yield (
+                    i, j,
+                    (slice(p_lo - i * cp, p_hi - i * cp), slice(s_lo - j * cs, s_hi - j * cs)),
+                    (slice(p_lo - paths.start, p_hi - paths.start), slice(s_lo - steps.start, s_hi - steps.start)),
+                )
+
+
+class PathStoreWriter(_Layout):
+    def __init__(
+            self,
+            directory: str,
+            n_paths: int,
+            n_steps: int,
+            tenors_m: Sequence[int],
+            dt: Union[float, Sequence[float]],
+            chunk_paths: Optional[int] = None,
+            chunk_steps: int = DEFAULT_CHUNK_STEPS,
+            dtype=np.float64,
+            seed: Optional[int] = None,
+            vol_loadings: Optional[np.ndarray] = None,
+            attrs: Optional[dict] = None,
+            overwrite: bool = False,
+            max_open_tiles: int = 64,
+    ):
+        """
+        directory:    store location; must not exist unless overwrite=True
+        n_paths, n_steps: the store holds (n_paths, n_steps + 1, len(tenors_m)) values
+        dt:           step length in years, scalar or one per step
+        chunk_paths:  paths per tile; default sizes tiles to about TILE_BYTES
+        chunk_steps:  time steps per tile
+        dtype:        float64, or float32 to halve the footprint
+        seed, vol_loadings, attrs: provenance recorded in meta.json (loadings as a hash)
+        """
+        tenors_m = [int(t) for t in tenors_m]
+        if n_paths <= 0 or n_steps <= 0 or not tenors_m:
+            raise ValueError("n_paths, n_steps and tenors_m must be positive / non-empty.")
+        dtype = np.dtype(dtype)
+        if chunk_paths is None:
+            chunk_paths = max(1, TILE_BYTES // (chunk_steps * len(tenors_m) * dtype.itemsize))
+        if chunk_paths <= 0 or chunk_steps <= 0:
+            raise ValueError("chunk_paths and chunk_steps must be positive.")
+        dt = np.atleast_1d(np.asarray(dt, dtype=float))
+        if len(dt) not in (1, n_steps) or np.any(dt <= 0):
+            raise ValueError(f"dt must be positive, a scalar or one per step ({n_steps}).")
+
+        if os.path.exists(directory):
+            if not overwrite:
+                raise FileExistsError(f"{directory} exists; pass overwrite=True to replace it.")
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+        super().__init__(directory, (n_paths, n_steps + 1, len(tenors_m)),
+                         (min(chunk_paths, n_paths), min(chunk_steps, n_steps + 1)))
+
+        self.dtype = dtype
+        self.meta = {
+            "format": FORMAT,
+            "version": VERSION,
+            "shape": list(self.shape),
+            "chunks": list(self.chunks),
+            "dtype": dtype.str,
+            "tenors_m": tenors_m,
+            "dt": float(dt[0]) if len(dt) == 1 else dt.tolist(),
+            "seed": None if seed is None else int(seed),
+            "loadings_hash": None if vol_loadings is None else array_hash(vol_loadings),
+            "attrs": dict(attrs or {}),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "complete": False,
+        }
+        self.max_open_tiles = max_open_tiles
+        self._open: OrderedDict[tuple, np.memmap] = OrderedDict()
+        self._created: set[tuple] = set()
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        tmp = os.path.join(self.directory, META_FILE + ".tmp")
+        with open(tmp, "w") as fh:
+            json.dump(self.meta, fh, indent=2)
+        os.replace(tmp, os.path.join(self.directory, META_FILE))
+
+    def _tile(self, i: int, j: int) -> np.memmap:
+        key = (i, j)
+        tile = self._open.get(key)
+        if tile is not None:
+            self._open.move_to_end(key)
+            return tile
+        if key in self._created:
+            tile = np.load(self.tile_path(i, j), mmap_mode="r+")
+        else:
+            tile = np.lib.format.open_memmap(
+                self.tile_path(i, j), mode="w+", dtype=self.dtype, shape=self.tile_shape(i, j),
+            )
+            self._created.add(key)
+        self._open[key] = tile
+        while len(self._open) > self.max_open_tiles:
+            _, old = self._open.popitem(last=False)
+            old.flush()
+        return tile
+
+    def write(self, block: np.ndarray, path_start: int = 0, step_start: int = 0) -> None:
+        """Write block (n_block_paths, n_block_steps, n_tenors) at (path_start, step_start)."""
+        block = np.asarray(block)
+        if block.ndim != 3 or block.shape[2] != self.n_tenors:
+            raise ValueError(f"block must have shape (paths, steps, {self.n_tenors}), got {block.shape}.")
+        paths = range(path_start, path_start + block.shape[0])
+        steps = range(step_start, step_start + block.shape[1])
+        if path_start < 0 or step_start < 0 or paths.stop > self.shape[0] or steps.stop > self.shape[1]:
+            raise ValueError(
+                f"block at ({path_start}, {step_start}) with shape {block.shape[:2]} "
+                f"exceeds the store's {self.shape[:2]}."
+            )
+        for i, j, tile_idx, block_idx in self.overlaps(paths, steps):
+            self._tile(i, j)[tile_idx] = block[block_idx]
+
+    def flush(self) -> None:
+        for tile in self._open.values():
+            tile.flush()
+
+    def close(self) -> "PathStore":
+        """Flush every tile, mark the store complete if all tiles were written, and reopen it for reading."""
+        self.flush()
+        self._open.clear()
+        self.meta["complete"] = len(self._created) == self.grid[0] * self.grid[1]
+        self._write_meta()
+        return PathStore(self.directory)
+
+    def __enter__(self) -> "PathStoreWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PathStore(_Layout):
+    """Lazy reader: tiles are memory-mapped on first touch; slices read only what they need."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META_FILE)) as fh:
+            meta = json.load(fh)
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"{directory} is not a path store.")
+        if meta.get("version", 0) > VERSION:
+            raise ValueError(f"Path store version {meta['version']} is newer than supported ({VERSION}).")
+        super().__init__(directory, meta["shape"], meta["chunks"])
+        self.meta = meta
+        self.dtype = np.dtype(meta["dtype"])
+        self._tiles: dict[tuple, np.memmap] = {}
+
+    def __repr__(self):
+        return (f"PathStore({self.directory!r}, shape={self.shape}, chunks={self.chunks}, "
+                f"dtype={self.dtype}, complete={self.meta['complete']})")
+
+    @property
+    def tenors_m(self) -> np.ndarray:
+        return np.asarray(self.meta["tenors_m"], dtype=int)
+
+    @property
+    def dt(self) -> np.ndarray:
+        """Per-step year fractions, (n_steps,)."""
+        return np.broadcast_to(np.asarray(self.meta["dt"], dtype=float), (self.n_steps,))
+
+    @property
+    def times(self) -> np.ndarray:
+        """Simulation time of each stored step, (n_steps + 1,), starting at 0."""
+        return np.concatenate([[0.0], np.cumsum(self.dt)])
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self.meta["seed"]
+
+    @property
+    def loadings_hash(self) -> Optional[str]:
+        return self.meta["loadings_hash"]
+
+    def _tile(self, i: int, j: int) -> np.memmap:
+        tile = self._tiles.get((i, j))
+        if tile is None:
+            path = self.tile_path(i, j)
+            if not os.path.exists(path):
+                raise ValueError(f"Tile {_tile_name(i, j)} was never written.")
+            tile = self._tiles[(i, j)] = np.load(path, mmap_mode="r")
+        return tile
+
+    def read(self, paths: Union[int, slice] = slice(None), steps: Union[int, slice] = slice(None)) -> np.ndarray:
+        """Assemble (paths, steps, n_tenors) from the tiles it touches; int keys drop their axis."""
+        p, p_int = _as_range(paths, self.shape[0])
+        s, s_int = _as_range(steps, self.shape[1])
+        out = np.empty((len(p), len(s), self.n_tenors), dtype=self.dtype)
+        for i, j, tile_idx, block_idx in self.overlaps(p, s):
+            out[block_idx] = self._tile(i, j)[tile_idx]
+        return out[(0 if p_int else slice(None), 0 if s_int else slice(None))]
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError("PathStore is 3-D (paths, steps, tenors).")
+        key = key + (slice(None),) * (3 - len(key))
+        out = self.read(key[0], key[1])
+        n_dropped = isinstance(key[0], (int, np.integer)) + isinstance(key[1], (int, np.integer))
+        return out[(Ellipsis, key[2])] if n_dropped < 2 else out[key[2]]
+
+    def at_step(self, t: int) -> np.ndarray:
+        """All paths at step t, (n_paths, n_tenors)."""
+        return self.read(slice(None), t)
+
+    def path_block(self, i: int) -> np.ndarray:
+        """The i-th chunk of paths over all steps, (≤ chunk_paths, n_steps + 1, n_tenors)."""
+        if not 0 <= i < self.grid[0]:
+            raise IndexError(f"path block {i} out of range ({self.grid[0]} blocks).")
+        cp = self.chunks[0]
+        return self.read(slice(i * cp, min((i + 1) * cp, self.shape[0])))
+
+    def iter_path_blocks(self) -> Iterator[tuple[int, np.ndarray]]:
+        """Yield (first path index, block) over the whole store, one tile row at a time."""
+        for i in range(self.grid[0]):
+            yield i * self.chunks[0], self.path_block(i)
+
+    def to_array(self) -> np.ndarray:
+        return self.read()
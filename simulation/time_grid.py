@@ -0,0 +1,63 @@
+"""
+Event-driven simulation time grids.
+
+A book only needs the simulated curve on its fixing dates and the bank account on its
+pay dates, so the grid is the union of those event times (plus 0), optionally refined so
+no step exceeds `max_dt`. Each gap is split into equal steps, which keeps the number of
+distinct step sizes — and so of step kernels to prepare — at most one per gap:
+
+    events 0.25, 0.5, 0.75, …        max_dt=None   → 0, 0.25, 0.5, …
+                                     max_dt=1/12   → 0, 1/12, 2/12, 0.25, …
+
+Event times closer than `EVENT_TOL` years are merged; `locate` maps dates back to grid
+indices and rejects dates that are not on the grid. `refine_grid` bisects (or splits
+by any factor) every step, giving the nested grids multilevel estimators need.
+"""
+from typing import Optional
+
+import numpy as np
+
+EVENT_TOL = 1e-9    # years (~0.03 s)
+
+
+def event_grid(event_times: np.ndarray, max_dt: Optional[float] = None, tol: float = EVENT_TOL) -> np.ndarray:
+    """Increasing times 0 = t_0 < … < t_n containing every event time, gaps ≤ max_dt."""
+    t = np.asarray(event_times, dtype=float).ravel()
+    if np.any(t < -tol) or not np.all(np.isfinite(t)):
+        raise ValueError("event times must be finite and non-negative.")
+    t = np.sort(np.concatenate([[0.0], t[t > tol]]))
+    t = t[np.concatenate([[True], np.diff(t) > tol])]
+    if max_dt is None or len(t) == 1:
+        return t
+    if max_dt <= 0:
+        raise ValueError("max_dt must be positive.")
+
+    gaps = np.diff(t)
+    n_sub = np.maximum(np.ceil(gaps / max_dt - 1e-9), 1).astype(int)
+    ends = np.cumsum(n_sub)
+    j = np.arange(ends[-1]) - np.repeat(ends - n_sub, n_sub)         # position within its gap
+    out = np.empty(ends[-1] + 1)
+    out[0] = 0.0
+    out[1:] = np.repeat(t[:-1], n_sub) + (j + 1) * np.repeat(gaps / n_sub, n_sub)
+    out[ends] = t[1:]                                                  # events exactly, not rounded
+    return out
+
+
+def locate(times: np.ndarray, dates: np.ndarray, tol: float = EVENT_TOL) -> np.ndarray:
+    """Grid index of each date; raises if a date is further than tol from every grid time."""
+    times = np.asarray(times, dtype=float)
+    dates = np.asarray(dates, dtype=float)
+    idx = np.minimum(np.searchsorted(times, dates - tol), len(times) - 1)
+    off = np.abs(times[idx] - dates) > tol
+    if np.any(off):
+        raise ValueError(f"{int(off.sum())} date(s) are not on the simulation grid, e.g. {dates[off][0]:g}.")
+    return idx
+
+
+def refine_grid(times: np.ndarray, factor: int = 2) -> np.ndarray:
+    """Split every step into `factor` equal sub-steps; the original times stay grid nodes."""
+    times = np.asarray(times, dtype=float)
+    if factor < 1:
+        raise ValueError("factor must be a positive integer.")
+    sub = times[:-1, None] + np.diff(times)[:, None] * (np.arange(factor) / factor)
+    return np.concatenate([sub.ravel(), times[-1:]])
@@ -3,8 +3,8 @@ import pandas as pd
 from typing import Optional, Any, Callable, ParamSpec, Concatenate, Iterable
 from functools import wraps
 from dataclasses import dataclass, field
-from tqdm import tqdm
 
+from utils.instrumentation import instrumented, stage
 from volatility.pca_result import PCAResult
 
 DateKey = pd.Timestamp
@@ -31,13 +31,19 @@ def vectorize_over_dates(func:Callable[Concatenate[object, DateKey, P], tuple]):
 
         # Probe the first date once so we can size the output containers, then
         # iterate over the remainder. This avoids re-running func on dates[0].
-        first = func(self, dates[0], **kwargs)
+        label = func.__qualname__
+        with stage(label, unit="dates", units=1, item=dates[0]):
+            first = func(self, dates[0], **kwargs)
         n_keys = len(first) if isinstance(first, dict) else 1
         stores = [dict() for _ in range(n_keys)]
         _store(stores, dates[0], first)
 
+        from tqdm import tqdm
+
         for date in tqdm(dates[1:]):
-            _store(stores, date, func(self, date, **kwargs))
+            with stage(label, unit="dates", units=1, item=date):
+                output = func(self, date, **kwargs)
+            _store(stores, date, output)
 
         return stores[0] if n_keys == 1 else tuple(stores)
     return wrapper
@@ -70,13 +76,49 @@ class VolatilitySurface:
         self._get_bdays_dict()
         self._check_if_nobs_deficient()
 
+    @instrumented("VolatilitySurface.build", unit="dates", count=lambda res, self: len(self.timeline))
     def build(self):
         self.windowed_fwds = self._get_fwds_within_window(self.timeline)
         self.localVols = self._pca(self.timeline)
 
-    def _get_windowed_timeline(self):
+    @instrumented("VolatilitySurface.extend", unit="dates", count=lambda res, self, new_forward_curves: len(new_forward_curves))
+    def extend(self, new_forward_curves: pd.DataFrame):
+        """
+        Append forward curves dated after the last one, in place. Windows, bday counts
+        and (if built) windowed fwds and PCA are computed for the new dates only; the
+        result matches a fresh VolatilitySurface(...).build() on the combined history.
+        """
+        new = new_forward_curves
+        if len(new) == 0:
+            return
+        if list(new.columns) != self.tenors:
+            raise ValueError(f"New curves' tenors {list(new.columns)} don't match {self.tenors}.")
+        if not new.index.is_monotonic_increasing or not new.index.is_unique:
+            raise ValueError("New curves must have strictly increasing dates.")
+        if new.index[0] <= self._full_timeline[-1]:
+            raise ValueError(f"New curves must start after {self._full_timeline[-1]}, got {new.index[0]}.")
+
+        self.forward_curves = pd.concat([self.forward_curves, new])
+        self._full_timeline = self.forward_curves.index
+        self.windowed_bdays.update(self._get_bdays_within_window(list(new.index)))
+
+        start = self._windowed_timeline_start()
+        new_timeline = [i for i in new.index if i >= start]
+        self.timeline.extend(new_timeline)
+        self.windowed_fwds_df = pd.concat([self.windowed_fwds_df, new.loc[new_timeline]])
+        self._get_bdays_dict()
+        self._check_if_nobs_deficient()
+
+        if self.localVols is not None:
+            self.windowed_fwds.update(self._get_fwds_within_window(new_timeline))
+            self.localVols.update(self._pca(new_timeline))
+
+    def _windowed_timeline_start(self) -> DateKey:
         timeline_start = min(self.windowed_bdays.keys())
-        windowed_timeline_start = timeline_start + pd.offsets.BusinessDay(n=self.windowed_bdays[timeline_start])
+        return timeline_start + pd.offsets.BusinessDay(n=self.windowed_bdays[timeline_start])
+
+    def _get_windowed_timeline(self):
+        windowed_timeline_start = self._windowed_timeline_start()
         self.timeline = [i for i in self._full_timeline if i>= windowed_timeline_start]
 
     def _check_if_nobs_deficient(self):
@@ -101,8 +143,10 @@ class VolatilitySurface:
         return self.localVols[DateKey].polyfit(degrees)['fittedVols']
 
     def _get_bdays_dict(self):
+        # Years already counted are kept, so extend() only counts the new ones.
+        known = self.bdays_dict or {}
         self.bdays_dict = {
-            year: len(
+            year: known[year] if year in known else len(
                 pd.bdate_range(start=f'{year}-1-1', end=f'{year}-12-31')) for year in 
             list(range(self.timeline[0].year, self.timeline[-1].year+1))
         }
@@ -0,0 +1,259 @@
+"""
+Opt-in per-stage timing and throughput instrumentation.
+
+    from utils import instrumentation as instr
+
+    instr.enable()                        # or set HJM_INSTRUMENT=1 (HJM_INSTRUMENT=mem adds memory)
+    ...run the pipeline...
+    instr.REGISTRY.log()                  # one line per stage through utils.logging
+    instr.REGISTRY.to_json("timings.json")
+
+Library code marks stages with
+
+    @instrumented("VolatilitySurface.build", unit="dates", count=lambda res, self: len(self.timeline))
+    def build(self): ...
+
+    with stage("noise", unit="draws") as s:  # or, inside an instrumented function,
+        ...                                  # add_units(n) on the innermost open stage
+        s.units += n
+
+Each stage key is the '/'-joined path of open stages, so the same function called from
+different parents is reported separately. Per key the registry keeps call count, total /
+min / max wall time, processed units and throughput (units/s), the slowest `item`s (e.g.
+which dates dominated a per-date loop) and, with memory tracking on, the peak bytes
+allocated above the level at stage entry (tracemalloc, nested-stage aware).
+
+Disabled (the default), `stage` returns a shared no-op context and `instrumented`
+wrappers cost one global lookup per call.
+"""
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from utils.logging import setup_logger
+
+SLOWEST_ITEMS = 5
+
+_ENABLED = False
+_TRACK_MEMORY = False
+_local = threading.local()
+
+
+class StageStats:
+    __slots__ = ("unit", "calls", "total_s", "min_s", "max_s", "units", "peak_bytes", "slowest")
+
+    def __init__(self, unit: Optional[str]):
+        self.unit = unit
+        self.calls = 0
+        self.total_s = 0.0
+        self.min_s = float("inf")
+        self.max_s = 0.0
+        self.units = 0
+        self.peak_bytes: Optional[int] = None
+        self.slowest: list[tuple[float, str]] = []   # min-heap of the slowest items
+
+    def to_dict(self) -> dict:
+        out = {
+            "calls": self.calls,
+            "total_s": self.total_s,
+            "mean_s": self.total_s / self.calls if self.calls else 0.0,
+            "min_s": self.min_s if self.calls else 0.0,
+            "max_s": self.max_s,
+        }
+        if self.unit is not None:
+            out["unit"] = self.unit
+            out["units"] = self.units
+            out["throughput_per_s"] = self.units / self.total_s if self.total_s > 0 else None
+        if self.peak_bytes is not None:
+            out["peak_bytes"] = self.peak_bytes
+        if self.slowest:
+            out["slowest"] = [{"item": item, "seconds": s} for s, item in sorted(self.slowest, reverse=True)]
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._stats: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, unit: Optional[str], seconds: float, units: int,
+               peak_bytes: Optional[int], item: Any) -> None:
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = StageStats(unit)
+            st.calls += 1
+            st.total_s += seconds
+            st.min_s = min(st.min_s, seconds)
+            st.max_s = max(st.max_s, seconds)
+            st.units += units
+            if peak_bytes is not None:
+                st.peak_bytes = max(st.peak_bytes or 0, peak_bytes)
+            if item is not None:
+                entry = (seconds, str(item))
+                if len(st.slowest) < SLOWEST_ITEMS:
+                    heapq.heappush(st.slowest, entry)
+                elif entry > st.slowest[0]:
+                    heapq.heapreplace(st.slowest, entry)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {key: st.to_dict() for key, st in self._stats.items()}
+
+    def to_json(self, path: Optional[str] = None, indent: int = 2) -> str:
+        text = json.dumps(self.to_dict(), indent=indent)
+        if path is not None:
+            with open(path, "w") as fh:
+                fh.write(text + "\n")
+        return text
+
+    def log(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        logger = logger or setup_logger(__name__)
+        for key, st in sorted(self.to_dict().items(), key=lambda kv: -kv[1]["total_s"]):
+            msg = f"{key}: {st['calls']} calls, {st['total_s']:.4f}s total, {st['max_s']:.4f}s max"
+            if st.get("throughput_per_s") is not None:
+                msg += f", {st['throughput_per_s']:.4g} {st['unit']}/s"
+            if "peak_bytes" in st:
+                msg += f", peak {st['peak_bytes'] / 2 ** 20:.1f} MiB"
+            if "slowest" in st:
+                msg += f", slowest {st['slowest'][0]['item']}"
+            logger.log(level, msg)
+
+
+REGISTRY = Registry()
+
+
+def enable(track_memory: bool = False) -> None:
+    """Start recording. track_memory also starts tracemalloc (slows allocation-heavy code)."""
+    global _ENABLED, _TRACK_MEMORY
+    _ENABLED = True
+    _TRACK_MEMORY = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    global _ENABLED, _TRACK_MEMORY
+    _ENABLED = False
+    if _TRACK_MEMORY and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _TRACK_MEMORY = False
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _Stage:
+    __slots__ = ("name", "unit", "units", "item", "_key", "_start", "_mem_start", "_peak_seen")
+
+    def __init__(self, name: str, unit: Optional[str], units: int, item: Any):
+        self.name = name
+        self.unit = unit
+        self.units = units
+        self.item = item
+
+    def __enter__(self) -> "_Stage":
+        stack = _stack()
+        self._key = f"{stack[-1]._key}/{self.name}" if stack else self.name
+        if _TRACK_MEMORY and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+            tracemalloc.reset_peak()
+            self._mem_start, self._peak_seen = current, current
+        else:
+            self._mem_start = None
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        seconds = time.perf_counter() - self._start
+        stack = _stack()
+        stack.pop()
+        peak_bytes = None
+        if self._mem_start is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self._peak_seen)
+            peak_bytes = peak - self._mem_start
+            if stack and stack[-1]._mem_start is not None:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+        REGISTRY.record(self._key, self.unit, seconds, self.units, peak_bytes, self.item)
+
+
+class _NullStage:
+    __slots__ = ()
+    units = 0
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def __setattr__(self, name, value) -> None:  # `s.units += n` is a no-op when disabled
+        pass
+
+
+_NULL = _NullStage()
+
+
+def stage(name: str, unit: Optional[str] = None, units: int = 0, item: Any = None):
+    """Context manager timing one stage; `units` processed can also be added on the handle."""
+    if not _ENABLED:
+        return _NULL
+    return _Stage(name, unit, units, item)
+
+
+def add_units(n: int) -> None:
+    """Credit n processed units to the innermost open stage (no-op when disabled)."""
+    if _ENABLED:
+        stack = _stack()
+        if stack:
+            stack[-1].units += n
+
+
+def instrumented(
+        name: Optional[str] = None,
+        unit: Optional[str] = None,
+        count: Optional[Callable[..., int]] = None,
+):
+    """
+    Decorator form of `stage`. `count(result, *args, **kwargs)` returns the units the
+    call processed; alternatively the function body can call `add_units`.
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            with _Stage(label, unit, 0, None) as st:
+                result = func(*args, **kwargs)
+                if count is not None:
+                    st.units += int(count(result, *args, **kwargs))
+                return result
+        return wrapper
+    return decorator
+
+
+if os.environ.get("HJM_INSTRUMENT", "").lower() in ("1", "true", "mem"):
+    enable(track_memory=os.environ["HJM_INSTRUMENT"].lower() == "mem")
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Streaming mean / variance (Welford, with Chan's pairwise merge for whole batches).
+
+    Numerically stable for long runs where naive Σx, Σx² accumulation cancels.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x: np.ndarray) -> "RunningMoments":
+        x = np.asarray(x, dtype=float).ravel()
+        n_b = len(x)
+        if n_b == 0:
+            return self
+        mean_b = float(x.mean())
+        m2_b = float(((x - mean_b) ** 2).sum())
+
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+        return self
+
+    @property
+    def var(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def se(self) -> float:
+        return float(np.sqrt(self.var / self.count)) if self.count > 1 else float('inf')
+
+
+class ColumnMoments:
+    """`RunningMoments` per column: batches are (n_samples, n_columns), statistics (n_columns,)."""
+    def __init__(self, n_columns: int):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self._m2 = np.zeros(n_columns)
+
+    def update(self, x: np.ndarray) -> "ColumnMoments":
+        x = np.asarray(x, dtype=float).reshape(-1, len(self.mean))
+        n_b = len(x)
+        if n_b == 0:
+            return self
+        mean_b = x.mean(axis=0)
+        m2_b = ((x - mean_b) ** 2).sum(axis=0)
+
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / n
+        self._m2 = self._m2 + m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+        return self
+
+    @property
+    def var(self) -> np.ndarray:
+        return self._m2 / (self.count - 1) if self.count > 1 else np.full_like(self.mean, np.nan)
+
+    @property
+    def se(self) -> np.ndarray:
+        return np.sqrt(self.var / self.count) if self.count > 1 else np.full_like(self.mean, np.inf)
@@ -0,0 +1,232 @@
+"""
+Cap/floor volatility cube: expiry × accrual × strike, per quoting model.
+
+Implements the `vol_surface` interface the closed-form engines consume,
+
+    capfloor_vol(T, accrual, strike, model)     scalar, memoized per (model, T, accrual, K)
+    capfloor_vols(T, accrual, strike, model)    arrays, one vectorized lookup per book
+
+with `model` in {'lognormal', 'normal'}.
+
+Interpolation: PCHIP across strike (the smile), linear across expiry and accrual, flat
+extrapolation on every axis. PCHIP is shape-preserving — it never overshoots the
+neighbouring quotes — so non-negative quotes interpolate to non-negative vols. The
+PCHIP coefficients for every (expiry, accrual) node are computed once at construction,
+so a lookup is a bracket search plus a Horner evaluation at the four surrounding nodes.
+
+Build from market quotes (`from_quotes`), or from an HJM model by pricing single-caplet
+caps on a common Monte Carlo path set and inverting to implied vols (`from_hjm`).
+"""
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MODELS = ("lognormal", "normal")
+
+
+class CapFloorVolCube:
+    def __init__(
+            self,
+            expiries: np.ndarray,
+            accruals: np.ndarray,
+            strikes: np.ndarray,
+            vols: dict[str, np.ndarray],
+            memo_size: int = 100_000,
+    ):
+        """
+        expiries:   (n_exp,)  option expiries (caplet fixing times) in years, increasing
+        accruals:   (n_acc,)  caplet accrual lengths in years, increasing
+        strikes:    (n_k,)    strikes, increasing, at least two
+        vols:       model → (n_exp, n_acc, n_k) vol quotes; lognormal and/or normal
+        memo_size:  entries kept by the scalar `capfloor_vol` memo before it is reset
+        """
+        self.expiries = np.asarray(expiries, dtype=float)
+        self.accruals = np.asarray(accruals, dtype=float)
+        self.strikes = np.asarray(strikes, dtype=float)
+        for name, grid in (("expiries", self.expiries), ("accruals", self.accruals), ("strikes", self.strikes)):
+            if grid.ndim != 1 or len(grid) == 0 or not np.all(np.diff(grid) > 0):
+                raise ValueError(f"{name} must be a non-empty, strictly increasing 1-D array.")
+        if len(self.strikes) < 2:
+            raise ValueError("Need at least two strikes to interpolate the smile.")
+        if not vols:
+            raise ValueError("vols cannot be empty.")
+
+        from scipy.interpolate import PchipInterpolator
+
+        shape = (len(self.expiries), len(self.accruals), len(self.strikes))
+        self.vols: dict[str, np.ndarray] = {}
+        self._coeffs: dict[str, np.ndarray] = {}
+        for model, v in vols.items():
+            if model not in MODELS:
+                raise ValueError(f"Unknown model '{model}'. Supported: {MODELS}.")
+            v = np.asarray(v, dtype=float)
+            if v.shape != shape:
+                raise ValueError(f"{model} vols have shape {v.shape}, expected {shape}.")
+            if not np.all(np.isfinite(v)) or np.any(v < 0):
+                raise ValueError(f"{model} vols must be finite and non-negative.")
+            self.vols[model] = v
+            # (4, n_k - 1, n_exp, n_acc) PCHIP coefficients in (K - K_j).
+            self._coeffs[model] = PchipInterpolator(self.strikes, v, axis=2).c
+
+        self.memo_size = memo_size
+        self._memo: dict[tuple, float] = {}
+
+    def __repr__(self):
+        return (f"CapFloorVolCube(models={list(self.vols)}, expiries={len(self.expiries)}, "
+                f"accruals={len(self.accruals)}, strikes={len(self.strikes)})")
+
+    # ------------------------------------------------------------------ lookup
+
+    def capfloor_vol(self, T: float, accrual: float, strike: float, model: str) -> float:
+        key = (model, float(T), float(accrual), float(strike))
+        vol = self._memo.get(key)
+        if vol is None:
+            vol = float(self.capfloor_vols(T, accrual, strike, model=model))
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[key] = vol
+        return vol
+
+    def capfloor_vols(self, T, accrual, strike, model: str) -> np.ndarray:
+        try:
+            c = self._coeffs[model]
+        except KeyError:
+            raise ValueError(f"No '{model}' quotes in this cube (have {list(self.vols)}).")
+        T, accrual, strike = np.broadcast_arrays(
+            np.asarray(T, dtype=float), np.asarray(accrual, dtype=float), np.asarray(strike, dtype=float),
+        )
+        e0, e1, we = _bracket(self.expiries, T)
+        a0, a1, wa = _bracket(self.accruals, accrual)
+
+        k = np.clip(strike, self.strikes[0], self.strikes[-1])
+        j = np.clip(np.searchsorted(self.strikes, k, side="right") - 1, 0, len(self.strikes) - 2)
+        dk = k - self.strikes[j]
+
+        def smile(e, a):
+            return ((c[0, j, e, a] * dk + c[1, j, e, a]) * dk + c[2, j, e, a]) * dk + c[3, j, e, a]
+
+        lo = (1.0 - wa) * smile(e0, a0) + wa * smile(e0, a1)
+        hi = (1.0 - wa) * smile(e1, a0) + wa * smile(e1, a1)
+        return (1.0 - we) * lo + we * hi
+
+    # ------------------------------------------------------------------ builders
+
+    @classmethod
+    def from_quotes(cls, quotes: "pd.DataFrame", **kwargs) -> "CapFloorVolCube":
+        """
+        Build from a long table with columns expiry, accrual, strike, model, vol. Every
+        model present must be quoted on the full expiry × accrual × strike grid.
+        """
+        import pandas as pd
+
+        missing = {"expiry", "accrual", "strike", "model", "vol"} - set(quotes.columns)
+        if missing:
+            raise ValueError(f"Missing columns: {sorted(missing)}.")
+
+        expiries = np.sort(quotes["expiry"].unique())
+        accruals = np.sort(quotes["accrual"].unique())
+        strikes = np.sort(quotes["strike"].unique())
+        full = pd.MultiIndex.from_product([expiries, accruals, strikes])
+
+        vols = {}
+        for model, grp in quotes.groupby("model"):
+            grid = grp.set_index(["expiry", "accrual", "strike"])["vol"]
+            if grid.index.has_duplicates:
+                raise ValueError(f"Duplicate {model} quotes.")
+            grid = grid.reindex(full)
+            if grid.isna().any():
+                raise ValueError(f"{model} quotes do not cover the full expiry × accrual × strike grid.")
+            vols[model] = grid.to_numpy().reshape(len(expiries), len(accruals), len(strikes))
+        return cls(expiries, accruals, strikes, vols, **kwargs)
+
+    @classmethod
+    def from_hjm(
+            cls,
+            simulator,
+            expiries: Sequence[float],
+            accruals: Sequence[float],
+            strikes: Sequence[float],
+            models: Sequence[str] = MODELS,
+            n_paths: int = 5000,
+            steps_per_year: int = 12,
+            **kwargs,
+    ) -> "CapFloorVolCube":
+        """
+        Model-implied cube: a caplet and a floorlet at every (expiry, accrual, strike)
+        node are priced by `CapFloorMCEngine.price_many` on one shared path set, then
+        inverted with the batched implied-vol solvers.
+
+        The forward and discount factor used in the inversion come from the same paths:
+        pathwise, caplet − floorlet = D·τ·(L − K), so across strikes it is exactly linear
+        in K with slope −τ·E[D] and intercept τ·E[D·L]. Inverting against the model's own
+        forward keeps ITM quotes above intrinsic despite discretization and MC error, and
+        each node is inverted from its out-of-the-money side.
+
+        Paths are simulated on the event grid of the expiries and pay dates, refined to
+        steps of at most 1/steps_per_year (see `CapFloorMCEngine.time_grid`).
+        """
+        from instruments.book import CapFloorBook
+        from pricers.capfloor_mc import CapFloorMCEngine
+        from pricers.implied_vol import black_implied_vol, bachelier_implied_vol
+
+        expiries = np.asarray(expiries, dtype=float)
+        accruals = np.asarray(accruals, dtype=float)
+        strikes = np.asarray(strikes, dtype=float)
+        if np.any(expiries <= 0):
+            raise ValueError("expiries must be > 0.")
+        if len(strikes) < 2:
+            raise ValueError("Need at least two strikes to interpolate the smile.")
+
+        shape = (len(expiries), len(accruals), len(strikes))
+        T, a, K = (g.ravel() for g in np.meshgrid(expiries, accruals, strikes, indexing="ij"))
+        n = len(T)
+        book = CapFloorBook(
+            strike=np.tile(K, 2),
+            notional=np.ones(2 * n),
+            sign=np.repeat(np.array([1, -1], dtype=np.int8), n),
+            offsets=np.arange(2 * n + 1),
+            pay_date=np.tile(T + a, 2),
+            fixing_time=np.tile(T, 2),
+            accrual=np.tile(a, 2),
+            start=np.tile(T, 2),
+            end=np.tile(T + a, 2),
+        )
+        pv = CapFloorMCEngine(simulator).price_many(book, n_paths=n_paths, steps_per_year=steps_per_year)["pv"]
+        cap, floor = pv[:n] / a, pv[n:] / a
+
+        # Parity line per (expiry, accrual): (cap − floor)/τ = E[D]·F − E[D]·K.
+        par = (cap - floor).reshape(shape)
+        annuity = -(par[..., -1] - par[..., 0]) / (strikes[-1] - strikes[0])
+        F = np.broadcast_to(((par[..., 0] + annuity * strikes[0]) / annuity)[..., None], shape).ravel()
+        annuity = np.broadcast_to(annuity[..., None], shape).ravel()
+
+        otm_call = K >= F
+        price = np.where(otm_call, cap, floor) / annuity
+        payoff = np.where(otm_call, "call", "put")
+
+        solvers = {"lognormal": black_implied_vol, "normal": bachelier_implied_vol}
+        vols = {}
+        for model in models:
+            if model not in solvers:
+                raise ValueError(f"Unknown model '{model}'. Supported: {MODELS}.")
+            vol, ok = solvers[model](price, F, K, T, payoff=payoff)
+            if not ok.all():
+                raise ValueError(
+                    f"{np.count_nonzero(~ok)} of {n} {model} implied vols failed to resolve; "
+                    f"increase n_paths or drop far out-of-the-money strikes."
+                )
+            vols[model] = vol.reshape(shape)
+        return cls(expiries, accruals, strikes, vols, **kwargs)
+
+
+def _bracket(grid: np.ndarray, x: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(i0, i1, w) with linear weight w on grid[i1]; flat outside the grid."""
+    if len(grid) == 1:
+        zeros = np.zeros(x.shape, dtype=int)
+        return zeros, zeros, np.zeros(x.shape)
+    i0 = np.clip(np.searchsorted(grid, x, side="right") - 1, 0, len(grid) - 2)
+    w = np.clip((x - grid[i0]) / (grid[i0 + 1] - grid[i0]), 0.0, 1.0)
+    return i0, i0 + 1, w
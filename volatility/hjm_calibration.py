@@ -0,0 +1,198 @@
+"""
+Calibration of HJM vol loadings to cap/floor prices.
+
+Loadings are parameterized exactly as `PCAResult.polyfit` produces them: factor j is a
+polynomial in tenor months, σ_j(x_i) = polyval(θ_j, tenors_m[i]). The inner pricer is the
+closed-form Gaussian HJM formula (`CapFloorGaussianHJMEngine`), in which a caplet depends
+on the loadings only through its bond-option variance
+
+    V = Σ_j ∫_0^{T_f} (S_j(u + Δ) - S_j(u))² du = Σ_j θ_jᵀ G θ_j,
+
+where G is the Gram matrix of the integrated polynomial basis for that caplet. The Grams
+are exact (piecewise-quartic Gauss–Legendre) and computed once per strip, after which
+every objective evaluation is a handful of small quadratic forms plus Black, and the
+Jacobian comes analytically from ∂V/∂θ_j = 2 G θ_j.
+
+`LoadingCalibrator` keeps the last solution and warm-starts from it, and reuses the Grams
+while the quoted strip (fixings and accruals) is unchanged, so daily recalibration is a
+few least-squares iterations.
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from instruments.book import CapFloorBook, as_book
+from instruments.capsfloors import CapFloor
+from pricers._helpers import norm_cdf_array, norm_pdf_array
+from pricers.capfloor_gaussian_hjm import _PiecewiseLinearIntegral, shift_integral
+from volatility.pca_result import PCAResult
+
+
+@dataclass
+class CalibrationResult:
+    params: list[np.ndarray]       # per-factor polyfit coefficients (highest degree first)
+    vol_loadings: np.ndarray       # (n_tenors, n_factors) σ_j on the tenor grid
+    model_pv: np.ndarray           # (n_trades,) calibrated prices
+    rmse: float                    # of the weighted residuals
+    n_evals: int
+    success: bool
+
+    def __repr__(self):
+        return f"CalibrationResult(rmse={self.rmse:.3g}, n_evals={self.n_evals}, success={self.success})"
+
+
+class LoadingCalibrator:
+    def __init__(self, tenors_m: np.ndarray, degrees: list[int]):
+        """
+        tenors_m:  (n_tenors,)  tenor grid in months (as in `PCAResult.tenors`)
+        degrees:   polynomial degree of each factor (as in `PCAResult.polyfit`)
+        """
+        self.tenors_m = np.asarray(tenors_m, dtype=int)
+        if not np.all(np.diff(self.tenors_m) > 0) or self.tenors_m[0] <= 0:
+            raise ValueError("tenors_m must be positive and strictly increasing.")
+        if len(degrees) == 0 or any(d < 0 for d in degrees):
+            raise ValueError("Expected at least one factor and non-negative degrees.")
+        self.tenors_yr = self.tenors_m.astype(float) / 12.0
+        self.degrees = list(degrees)
+        self.n_basis = max(self.degrees) + 1
+
+        # Columns are tenors_m ** p, highest power first (np.polyval order), scaled to unit
+        # max so the optimizer sees comparable coordinates.
+        powers = np.arange(self.n_basis - 1, -1, -1)
+        basis = self.tenors_m.astype(float)[:, None] ** powers
+        self._scale = np.abs(basis).max(axis=0)
+        self._basis = basis / self._scale
+        self._S = _PiecewiseLinearIntegral(self.tenors_yr, self._basis)
+
+        self.params: Optional[list[np.ndarray]] = None   # last solution, used as warm start
+        self._strip_key: Optional[bytes] = None
+        self._grams: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_pca(cls, pca: PCAResult, degrees: list[int]) -> "LoadingCalibrator":
+        """Calibrator on the PCA tenor grid, warm-started from the PCA polyfit."""
+        calib = cls(pca.tenors, degrees)
+        calib.params = [np.asarray(p, dtype=float) for p in pca.polyfit(degrees)["params"]]
+        return calib
+
+    def vol_loadings(self, params: Sequence[np.ndarray]) -> np.ndarray:
+        return np.stack([np.polyval(p, self.tenors_m) for p in params], axis=1)
+
+    def calibrate(
+            self,
+            f0: np.ndarray,
+            insts: Union[CapFloorBook, Sequence[CapFloor]],
+            quotes: np.ndarray,
+            weights: Optional[np.ndarray] = None,
+            x0: Optional[Sequence[np.ndarray]] = None,
+            **ls_kwargs,
+    ) -> CalibrationResult:
+        """
+        Fit the polynomial loadings to market PVs of a strip of caps/floors.
+
+        f0:       (n_tenors,) today's forward curve on the tenor grid
+        quotes:   (n_trades,) market PVs
+        weights:  residual weights; defaults to 1/|quote| (relative price errors)
+        x0:       starting coefficients; defaults to the previous solution (warm start)
+        ls_kwargs are passed to scipy.optimize.least_squares.
+        """
+        b = as_book(insts)
+        quotes = np.asarray(quotes, dtype=float)
+        if quotes.shape != (len(b),):
+            raise ValueError(f"quotes shape {quotes.shape} doesn't match {len(b)} trades.")
+        if weights is None:
+            weights = 1.0 / np.maximum(np.abs(quotes), 1e-12)
+        weights = np.asarray(weights, dtype=float)
+        if x0 is None:
+            x0 = self.params
+        if x0 is None:
+            raise ValueError("No previous solution to warm-start from; pass x0 (e.g. PCA polyfit params).")
+        if len(x0) != len(self.degrees):
+            raise ValueError(f"Expected {len(self.degrees)} factors, got {len(x0)}.")
+
+        pricer = self._strip_pricer(f0, b)
+
+        def residuals(z):
+            return weights * (pricer(z, False) - quotes)
+
+        def jacobian(z):
+            return weights[:, None] * pricer(z, True)[1]
+
+        fit = least_squares(residuals, self._pack(x0), jac=jacobian, **ls_kwargs)
+        params = self._unpack(fit.x)
+        self.params = params
+        return CalibrationResult(
+            params=params,
+            vol_loadings=self.vol_loadings(params),
+            model_pv=pricer(fit.x, False),
+            rmse=float(np.sqrt(np.mean(fit.fun ** 2))),
+            n_evals=int(fit.nfev),
+            success=bool(fit.success),
+        )
+
+    # ------------------------------------------------------------------ internals
+
+    def _pack(self, params: Sequence[np.ndarray]) -> np.ndarray:
+        """Per-factor coefficients → flat vector of scaled coordinates, (n_factors * n_basis,)."""
+        z = np.zeros((len(self.degrees), self.n_basis))
+        for j, (p, d) in enumerate(zip(params, self.degrees)):
+            p = np.asarray(p, dtype=float)
+            if len(p) != d + 1:
+                raise ValueError(f"Factor {j}: expected {d + 1} coefficients, got {len(p)}.")
+            z[j, self.n_basis - d - 1:] = p * self._scale[self.n_basis - d - 1:]
+        return z.ravel()
+
+    def _unpack(self, z: np.ndarray) -> list[np.ndarray]:
+        z = z.reshape(len(self.degrees), self.n_basis) / self._scale
+        return [z[j, self.n_basis - d - 1:].copy() for j, d in enumerate(self.degrees)]
+
+    def _free_mask(self) -> np.ndarray:
+        """Coordinates allowed to move: leading powers above a factor's degree stay at 0."""
+        mask = np.zeros((len(self.degrees), self.n_basis), dtype=bool)
+        for j, d in enumerate(self.degrees):
+            mask[j, self.n_basis - d - 1:] = True
+        return mask.ravel()
+
+    def _strip_grams(self, b: CapFloorBook) -> np.ndarray:
+        """(n_caplets, n_basis, n_basis) variance Grams; cached while the strip is unchanged."""
+        key = np.concatenate([b.fixing_time, b.end - b.start]).tobytes()
+        if key != self._strip_key:
+            delta = b.end - b.start
+            self._grams = shift_integral(self._S, delta, np.zeros_like(delta), b.fixing_time, outer=True)
+            self._strip_key = key
+        return self._grams
+
+    def _strip_pricer(self, f0: np.ndarray, b: CapFloorBook):
+        f0 = np.asarray(f0, dtype=float)
+        if f0.shape != self.tenors_m.shape:
+            raise ValueError(f"f0 shape {f0.shape} doesn't match tenors {self.tenors_m.shape}.")
+        if not np.allclose(b.pay_date, b.end):
+            raise ValueError("Calibration assumes caplets pay at the end of their accrual period.")
+
+        grams = self._strip_grams(b)
+        log_df = _PiecewiseLinearIntegral(self.tenors_yr, -f0)
+        T_f, delta = b.fixing_time, b.end - b.start
+        fwd_X = np.exp(log_df(T_f) - log_df(b.end))          # 1 + ΔF
+        k = 1.0 + delta * b.per_caplet(b.strike)
+        is_put = b.per_caplet(b.sign) != 1
+        scale = b.per_caplet(b.notional) * b.accrual * np.exp(log_df(b.pay_date)) / delta
+        n_factors, mask = len(self.degrees), self._free_mask()
+
+        def price(z, with_jac):
+            theta = z.reshape(n_factors, self.n_basis)
+            G_theta = np.einsum("cab,jb->cja", grams, theta)          # (n_caplets, n_factors, n_basis)
+            var = np.einsum("cja,ja->c", G_theta, theta)
+            s = np.sqrt(np.maximum(var, 1e-300))
+            d1 = (np.log(fwd_X / k) + 0.5 * var) / s
+            call = fwd_X * norm_cdf_array(d1) - k * norm_cdf_array(d1 - s)
+            pv = b.per_trade(scale * np.where(is_put, call - fwd_X + k, call))
+            if not with_jac:
+                return pv
+            # ∂C/∂V = F φ(d1) / (2√V),  ∂V/∂θ_j = 2 G θ_j
+            dC_dV = fwd_X * norm_pdf_array(d1) / (2.0 * s)
+            d_caplet = (scale * dC_dV)[:, None] * 2.0 * G_theta.reshape(len(var), -1)
+            return pv, b.per_trade(d_caplet.T).T * mask
+
+        return price
@@ -1,6 +1,4 @@
 import numpy as np
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt, matplotlib.ticker as mtick
 
 import logging
 from utils.logging import setup_logger
@@ -15,6 +13,8 @@ def iv_pca(
         max_k: int = MAX_PCA_K,
         elbow_graph: bool = False
 ):
+    from sklearn.decomposition import PCA
+
     # First PCA pass: diagnostics only
     pca_full = PCA(svd_solver="covariance_eigh")
     pca_full.fit(dF)
@@ -79,6 +79,8 @@ def graph_elbow(
         k_to_graph: int,
         explained_variance_ratio: np.ndarray
 ):
+    import matplotlib.pyplot as plt, matplotlib.ticker as mtick
+
     x_range = range(1, k_to_graph+1) 
     y_range = range(0,110,10)
     plt.xticks(x_range)